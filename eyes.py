@@ -1,13 +1,12 @@
 import cv2
 import mediapipe as mp
-import pyautogui
 import numpy as np
 import time
 from collections import deque
+from input_backends import create_backend
 
-# Disable pyautogui failsafe for smoother operation
-pyautogui.FAILSAFE = False
-pyautogui.PAUSE = 0
+# Cursor and click output (pyautogui failsafe disabled for smoother operation)
+input_backend = create_backend(pyautogui_pause=0)
 
 # Initialize webcam and face mesh
 cam = cv2.VideoCapture(0)
@@ -18,7 +17,7 @@ face_mesh = mp.solutions.face_mesh.FaceMesh(
 )
 
 # Get screen dimensions
-screen_w, screen_h = pyautogui.size()
+screen_w, screen_h = input_backend.size()
 
 # Smoothing for cursor movement
 SMOOTHING_WINDOW = 5
@@ -161,7 +160,7 @@ while True:
             smooth_y = int(np.mean(y_history))
             
             if not is_calibrating:
-                pyautogui.moveTo(smooth_x, smooth_y, duration=0.1)  # Increased from 0.02 to 0.1 sec for slower movement
+                input_backend.move_to(smooth_x, smooth_y, duration=0.1)  # Increased from 0.02 to 0.1 sec for slower movement
         
         # === WINK DETECTION ===
         # Left eye landmarks
@@ -253,7 +252,7 @@ while True:
             if (left_wink_frames >= WINK_CONFIRMATION_FRAMES and 
                 not left_wink_detected and 
                 current_time - last_action_time > MIN_ACTION_INTERVAL):
-                pyautogui.click()
+                input_backend.click()
                 print("LEFT WINK - CLICK!")
                 last_action_time = current_time
                 left_wink_detected = True
@@ -276,14 +275,14 @@ while True:
                 if (current_time - last_right_wink_time < DOUBLE_WINK_WINDOW and 
                     wink_count >= 1):
                     # Double click
-                    pyautogui.doubleClick()
+                    input_backend.double_click()
                     print("DOUBLE RIGHT WINK - DOUBLE CLICK!")
                     wink_count = 0
                     cv2.putText(frame, 'DOUBLE CLICK!', (10, 150), 
                                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 255), 3)
                 else:
                     # Single right click
-                    pyautogui.rightClick()
+                    input_backend.right_click()
                     print("RIGHT WINK - RIGHT CLICK!")
                     wink_count += 1
                     last_right_wink_time = current_time
@@ -350,4 +349,4 @@ while True:
 
 cam.release()
 cv2.destroyAllWindows()
-pyautogui.FAILSAFE = True
\ No newline at end of file
+input_backend.close()
\ No newline at end of file
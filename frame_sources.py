@@ -0,0 +1,509 @@
+"""
+Frame Sources
+Camera replacements for the hand controller, for running without hardware.
+
+Sources:
+- camera: a cv2.VideoCapture device (the default, device 0)
+- video: a video file, paced at its own frame rate
+- images: a directory of images in name order
+- synthetic: a rendered hand moving along a fixed path, with the frame id
+  embedded in the pixels; used for repeatable latency measurements
+
+Every source has the cv2.VideoCapture read()/release()/isOpened() interface
+so FrameGrabber can drive it, numbers frames from 1 in the order they are
+read (the same sequence FrameGrabber hands out) and remembers when each
+frame was produced. The source is chosen with create_source(); when no spec
+is given the VIRTUAL_MOUSE_SOURCE environment variable is used, falling
+back to camera 0.
+
+Cameras are opened in the mode picked by negotiate_camera_mode(): each
+candidate pixel format and size is measured for delivered fps and read
+latency, and the best mode for the latency target is cached per device in
+~/.cache/virtual-mouse/camera_modes.json. Run `python frame_sources.py
+[INDEX]` to probe again.
+"""
+
+import argparse
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+class FrameSource:
+    """Interface for frame producers
+
+    Subclasses implement _read() returning (ret, frame); read() adds frame
+    numbering, production timestamps and optional real-time pacing. Finite
+    sources set finished when they run out of frames, which tells the end
+    of the stream apart from a read failure (cameras never finish).
+    """
+    name = "base"
+
+    def __init__(self, fps=30.0, realtime=False, history=4096):
+        self.fps = fps
+        self.realtime = realtime  # Deliver frames no faster than fps
+        self.history = history    # Number of production timestamps kept
+        self.frame_id = 0         # Id of the last frame read (1-based)
+        self.produced_times = {}  # frame id -> time.perf_counter() when produced
+        self.finished = False     # True once a finite source ran out of frames
+        self.next_frame_time = None
+
+    def read(self):
+        """Return (ret, frame) for the next frame"""
+        if self.realtime and self.fps > 0:
+            now = time.perf_counter()
+            if self.next_frame_time is None:
+                self.next_frame_time = now
+            if self.next_frame_time > now:
+                time.sleep(self.next_frame_time - now)
+            self.next_frame_time = max(self.next_frame_time + 1.0 / self.fps, time.perf_counter())
+
+        ret, frame = self._read(self.frame_id + 1)
+        if not ret:
+            return False, None
+
+        self.frame_id += 1
+        self.produced_times[self.frame_id] = time.perf_counter()
+        self.produced_times.pop(self.frame_id - self.history, None)
+        return True, frame
+
+    def _read(self, frame_id):
+        raise NotImplementedError
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        """Release any resources held by the source"""
+
+class CameraSource(FrameSource):
+    """Live camera through cv2.VideoCapture
+
+    fourcc (e.g. "MJPG") selects the pixel format; many webcams only reach
+    their full frame rate at larger sizes with MJPG. See
+    negotiate_camera_mode() for picking the mode automatically.
+    """
+    name = "camera"
+
+    def __init__(self, index=0, width=1280, height=720, fps=30, fourcc=None):
+        super().__init__(fps)
+        self.cap = cv2.VideoCapture(index)
+        if fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, fourcc_code(fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Keep the driver queue short
+
+    def _read(self, frame_id):
+        return self.cap.read()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+class VideoFileSource(FrameSource):
+    """Frames of a video file, paced at the file's frame rate when realtime"""
+    name = "video"
+
+    def __init__(self, path, loop=False, realtime=True):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Cannot open video file '{path}'")
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime)
+        self.path = path
+        self.loop = loop
+
+    def _read(self, frame_id):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret and not self.loop:
+            self.finished = True
+        return ret, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+class ImageDirectorySource(FrameSource):
+    """Image files of a directory in name order"""
+    name = "images"
+    EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+    def __init__(self, path, fps=30.0, loop=False, realtime=True):
+        super().__init__(fps, realtime)
+        self.paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(self.EXTENSIONS))
+        if not self.paths:
+            raise ValueError(f"No images found in '{path}'")
+        self.loop = loop
+        self.position = 0
+
+    def _read(self, frame_id):
+        if self.position >= len(self.paths):
+            if not self.loop:
+                self.finished = True
+                return False, None
+            self.position = 0
+        frame = cv2.imread(self.paths[self.position])
+        self.position += 1
+        return frame is not None, frame
+
+# Capture modes tried by probe_camera: (fourcc, width, height, fps)
+PROBE_MODES = [
+    ('MJPG', 1280, 720, 30), ('MJPG', 960, 540, 30), ('MJPG', 640, 480, 60), ('MJPG', 640, 480, 30),
+    ('YUYV', 1280, 720, 30), ('YUYV', 960, 540, 30), ('YUYV', 640, 480, 30),
+]
+
+CACHE_PATH = os.path.join(os.environ.get('VIRTUAL_MOUSE_CACHE', os.path.expanduser('~/.cache/virtual-mouse')),
+                          'camera_modes.json')
+
+def fourcc_code(fourcc):
+    return cv2.VideoWriter_fourcc(*fourcc)
+
+def fourcc_name(code):
+    code = int(code)
+    return ''.join(chr((code >> (8 * index)) & 0xFF) for index in range(4)).strip('\x00') or '?'
+
+def device_key(index):
+    """Cache key of a camera: its index plus the device name where the OS exposes one"""
+    name_path = f"/sys/class/video4linux/video{index}/name"
+    try:
+        with open(name_path) as name_file:
+            return f"{index}:{name_file.read().strip()}"
+    except OSError:
+        return str(index)
+
+def measure_mode(index, fourcc, width, height, fps, frames=30, warmup=5, max_seconds=3.0):
+    """Open the camera in one mode and measure what it really delivers
+
+    Returns a dict with the requested and actual mode, whether the buffer
+    size request was accepted, the delivered fps, read time statistics and
+    an estimated capture latency (one frame interval plus read stalls
+    beyond it), or None when the camera delivers no frames in this mode.
+    """
+    cap = cv2.VideoCapture(index)
+    try:
+        if not cap.isOpened():
+            return None
+        cap.set(cv2.CAP_PROP_FOURCC, fourcc_code(fourcc))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        cap.set(cv2.CAP_PROP_FPS, fps)
+        buffer_ok = bool(cap.set(cv2.CAP_PROP_BUFFERSIZE, 1))
+        
+        deadline = time.perf_counter() + max_seconds
+        for _ in range(warmup):
+            if not cap.read()[0] or time.perf_counter() > deadline:
+                return None
+        
+        read_times = []
+        start = time.perf_counter()
+        while len(read_times) < frames and time.perf_counter() < deadline:
+            read_start = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                return None
+            read_times.append(time.perf_counter() - read_start)
+        elapsed = time.perf_counter() - start
+        if len(read_times) < 2:
+            return None
+        
+        delivered_fps = len(read_times) / elapsed
+        interval = 1.0 / delivered_fps
+        read_p90 = float(np.percentile(read_times, 90))
+        return {
+            'fourcc': fourcc, 'width': width, 'height': height, 'fps': fps,
+            'actual_fourcc': fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+            'actual_width': frame.shape[1], 'actual_height': frame.shape[0],
+            'buffer_size_ok': buffer_ok,
+            'delivered_fps': delivered_fps,
+            'read_ms_mean': 1000 * float(np.mean(read_times)),
+            'read_ms_p90': 1000 * read_p90,
+            'latency_ms': 1000 * (interval + max(0.0, read_p90 - interval)),
+        }
+    finally:
+        cap.release()
+
+def probe_camera(index, modes=None, verbose=True):
+    """Measure every mode in modes (default PROBE_MODES); returns the usable results"""
+    results = []
+    for fourcc, width, height, fps in modes or PROBE_MODES:
+        result = measure_mode(index, fourcc, width, height, fps)
+        if verbose:
+            if result is None:
+                print(f"  {fourcc} {width}x{height}@{fps}: no frames")
+            else:
+                print(f"  {fourcc} {width}x{height}@{fps}: got {result['actual_fourcc']} "
+                      f"{result['actual_width']}x{result['actual_height']} at {result['delivered_fps']:.1f} fps, "
+                      f"read {result['read_ms_mean']:.1f} ms, latency ~{result['latency_ms']:.0f} ms")
+        if result is not None:
+            results.append(result)
+    return results
+
+def choose_mode(results, latency_target_ms=50.0):
+    """Pick the best probed mode for a latency target
+
+    Modes that did not deliver the requested size are skipped. Modes that
+    accepted a one-frame driver buffer are preferred: otherwise the driver
+    may queue several frames, a delay the read timing cannot see. Among the
+    modes within the target, the largest frame wins (then the higher fps);
+    when none meets it, the lowest-latency mode is used.
+    """
+    usable = [result for result in results
+              if (result['actual_width'], result['actual_height']) == (result['width'], result['height'])]
+    if not usable:
+        return None
+    within = [result for result in usable if result['latency_ms'] <= latency_target_ms]
+    if within:
+        return max(within, key=lambda result: (result['buffer_size_ok'], result['width'] * result['height'],
+                                               result['delivered_fps']))
+    return min(usable, key=lambda result: (not result['buffer_size_ok'], result['latency_ms']))
+
+def load_mode_cache(path=CACHE_PATH):
+    try:
+        with open(path) as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+def negotiate_camera_mode(index, latency_target_ms=50.0, reprobe=False, cache_path=CACHE_PATH):
+    """Best capture mode of a camera, probed once and cached per device
+
+    The cache entry is reused while the latency target is unchanged; pass
+    reprobe=True after changing cameras or drivers. A camera that delivers
+    none of PROBE_MODES is cached too (as None, meaning the default mode),
+    so it is not probed again on every start.
+    """
+    key = device_key(index)
+    cache = load_mode_cache(cache_path)
+    entry = cache.get(key)
+    if entry and not reprobe and entry.get('latency_target_ms') == latency_target_ms:
+        return entry['mode']
+    
+    print(f"Probing capture modes of camera {index} (runs once per device)...")
+    mode = choose_mode(probe_camera(index), latency_target_ms)
+    if mode is None:
+        print("No capture mode delivered frames at the requested size - using the default mode")
+    else:
+        print(f"Selected {mode['fourcc']} {mode['width']}x{mode['height']}@{mode['fps']} "
+              f"({mode['delivered_fps']:.1f} fps, ~{mode['latency_ms']:.0f} ms)")
+    
+    cache[key] = {'latency_target_ms': latency_target_ms, 'mode': mode, 'probed_at': time.time()}
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as cache_file:
+            json.dump(cache, cache_file, indent=2)
+    except OSError as e:
+        print(f"Could not write the camera mode cache ({e})")
+    return mode
+
+# Landmark indices of each finger from base to tip
+FINGER_JOINTS = [(5, 6, 7, 8), (9, 10, 11, 12), (13, 14, 15, 16), (17, 18, 19, 20)]
+FINGER_OFFSETS = [-0.06, -0.02, 0.02, 0.06]  # MCP x offsets: index, middle, ring, pinky
+
+def synthetic_hand(finger_states, thumb_down=False, pinch=None, center=(0.5, 0.5), scale=1.0,
+                   rng=None, noise=0.003):
+    """Plausible (21, 3) landmarks of a mirrored right hand
+
+    finger_states is [thumb, index, middle, ring, pinky] (True = raised),
+    thumb_down points an extended thumb downwards, and pinch ('index' or
+    'middle') brings the thumb tip onto that fingertip.
+    """
+    cx, cy = center
+    s = 0.3 * scale
+    points = np.zeros((21, 3), dtype=np.float32)
+    points[0] = (cx, cy + 0.6 * s, 0)  # Wrist
+
+    for (mcp, pip, dip, tip), offset, raised in zip(FINGER_JOINTS, FINGER_OFFSETS, finger_states[1:]):
+        x = cx + offset * s / 0.3
+        if raised:
+            ys = (cy, cy - 0.2 * s, cy - 0.33 * s, cy - 0.43 * s)
+        else:
+            ys = (cy, cy - 0.13 * s, cy - 0.03 * s, cy + 0.03 * s)
+        for joint, y in zip((mcp, pip, dip, tip), ys):
+            points[joint] = (x, y, -0.01 * (joint % 4))
+
+    # Thumb: CMC, MCP, IP, TIP on the index side of the palm
+    points[1] = (cx - 0.17 * s, cy + 0.47 * s, 0)
+    points[2] = (cx - 0.3 * s, cy + 0.3 * s, 0)
+    if pinch is not None:
+        target = points[8] if pinch == 'index' else points[12]
+        points[4] = (target[0] - 0.03 * s, target[1], 0)
+        points[3] = (target[0] + 0.07 * s, target[1] + 0.1 * s, 0)
+    elif finger_states[0] and thumb_down:
+        points[3] = (cx - 0.4 * s, cy + 0.4 * s, 0)
+        points[4] = (cx - 0.5 * s, cy + 0.53 * s, 0)
+    elif finger_states[0]:
+        points[3] = (cx - 0.4 * s, cy + 0.17 * s, 0)
+        points[4] = (cx - 0.5 * s, cy + 0.07 * s, 0)
+    else:
+        points[3] = (cx - 0.23 * s, cy + 0.2 * s, 0)
+        points[4] = (cx - 0.13 * s, cy + 0.13 * s, 0)
+
+    if rng is not None and noise:
+        points[:, :2] += rng.normal(0, noise, (21, 2)).astype(np.float32)
+    return points
+
+# Bones drawn by the synthetic renderer (MediaPipe's hand connections)
+HAND_BONES = [(0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8), (5, 9), (9, 10),
+              (10, 11), (11, 12), (9, 13), (13, 14), (14, 15), (15, 16), (13, 17), (0, 17),
+              (17, 18), (18, 19), (19, 20)]
+PALM_IDS = [0, 1, 5, 9, 13, 17]
+
+# Frame id barcode: ID_BITS black/white cells of ID_CELL pixels along the top-left edge
+ID_BITS = 32
+ID_CELL = 8
+
+def encode_frame_id(frame, frame_id):
+    """Write frame_id into the top-left corner of a BGR frame"""
+    for bit in range(ID_BITS):
+        value = 255 if (frame_id >> bit) & 1 else 0
+        frame[:ID_CELL, bit * ID_CELL:(bit + 1) * ID_CELL] = value
+
+def decode_frame_id(frame, mirrored=False):
+    """Read the id written by encode_frame_id (mirrored for a flipped frame)"""
+    centers = np.arange(ID_BITS) * ID_CELL + ID_CELL // 2
+    if mirrored:
+        centers = frame.shape[1] - 1 - centers
+    bits = frame[ID_CELL // 2, centers, 1] > 127
+    return int(np.dot(bits, 1 << np.arange(ID_BITS, dtype=np.int64)))
+
+class SyntheticSource(FrameSource):
+    """Rendered hand that moves along a Lissajous path
+
+    The hand holds the pose given by finger_states (index finger only, i.e.
+    cursor control, by default) and is drawn in camera space, so it appears
+    unmirrored in the (flipped) preview. Each frame carries its
+    id in a barcode (see decode_frame_id), and the landmarks used to draw
+    it are kept for SyntheticTracker. frames limits the stream length
+    (None runs forever).
+    """
+    name = "synthetic"
+
+    def __init__(self, width=1280, height=720, fps=30.0, frames=None, realtime=True,
+                 finger_states=(False, True, False, False, False), period=4.0):
+        super().__init__(fps, realtime)
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.finger_states = list(finger_states)
+        self.period = period  # Seconds per loop of the path (in stream time)
+        self.landmarks = {}   # frame id -> (21, 3) landmarks in mirrored view coordinates
+        self.background = np.full((height, width, 3), (60, 50, 40), dtype=np.uint8)
+
+    def hand_at(self, frame_id):
+        """Landmarks of the hand in frame frame_id"""
+        phase = 2 * np.pi * frame_id / (self.fps * self.period)
+        center = (0.5 + 0.25 * np.sin(phase), 0.5 + 0.15 * np.sin(2 * phase))
+        return synthetic_hand(self.finger_states, center=center)
+
+    def _read(self, frame_id):
+        if self.frames is not None and frame_id > self.frames:
+            self.finished = True
+            return False, None
+
+        points = self.hand_at(frame_id)
+        self.landmarks[frame_id] = points
+        self.landmarks.pop(frame_id - self.history, None)
+
+        frame = self.background.copy()
+        pixels = np.empty((21, 2), dtype=np.int32)
+        pixels[:, 0] = ((1.0 - points[:, 0]) * self.width).astype(np.int32)  # Camera space is unmirrored
+        pixels[:, 1] = (points[:, 1] * self.height).astype(np.int32)
+        thickness = max(2, self.height // 40)
+        skin = (120, 160, 210)
+        cv2.fillConvexPoly(frame, cv2.convexHull(pixels[PALM_IDS]), skin)
+        for start, end in HAND_BONES:
+            cv2.line(frame, tuple(pixels[start]), tuple(pixels[end]), skin, thickness)
+        for x, y in pixels:
+            cv2.circle(frame, (int(x), int(y)), thickness // 2 + 1, (90, 120, 170), -1)
+
+        encode_frame_id(frame, frame_id)
+        return True, frame
+
+class SyntheticTracker:
+    """Ground-truth stand-in for RoiHandTracker on SyntheticSource frames
+
+    Decodes the frame id from the camera frame and returns the landmarks
+    the source drew, already in mirrored view coordinates like
+    RoiHandTracker's, so latency can be measured without the cost
+    or the detection misses of MediaPipe on a cartoon hand. Pass it as
+    HandMouseController(tracker=...) so the model is never loaded.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.roi = None
+        self.inference_scale = 1.0
+        self.last_convert_time = 0.0
+        self.last_inference_time = 0.0
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.tracking_lost = 0
+
+    def process(self, frame):
+        """MediaPipe-like results for an unmirrored BGR frame"""
+        start = time.perf_counter()
+        points = self.source.landmarks.get(decode_frame_id(frame))
+        self.full_frames += 1
+        self.last_inference_time = time.perf_counter() - start
+        hands = [SimpleNamespace(landmark=points)] if points is not None else None
+        return SimpleNamespace(multi_hand_landmarks=hands)
+
+    def set_input_size(self, size):
+        """Quality governor hook; the ground truth does not depend on the input size"""
+
+SOURCES = {
+    'camera': CameraSource,
+    'video': VideoFileSource,
+    'images': ImageDirectorySource,
+    'synthetic': SyntheticSource,
+}
+
+def create_source(spec=None, width=1280, height=720, fps=30, camera_probe="auto", latency_target_ms=50.0):
+    """Create a frame source from a spec
+
+    spec is a FrameSource (returned as is), a camera index, "synthetic",
+    an image directory or a video file path. width, height and fps apply
+    to the synthetic source and to cameras when camera_probe is "off";
+    otherwise cameras use the negotiated mode ("auto" reuses the cached
+    probe, "force" probes again).
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    spec = str(spec if spec is not None else os.environ.get('VIRTUAL_MOUSE_SOURCE', '0'))
+
+    if spec.isdigit():
+        index = int(spec)
+        if camera_probe != "off":
+            mode = negotiate_camera_mode(index, latency_target_ms, reprobe=camera_probe == "force")
+            if mode is not None:
+                return CameraSource(index, mode['width'], mode['height'], mode['fps'], mode['fourcc'])
+        return CameraSource(index, width, height, fps)
+    if spec == 'synthetic':
+        return SyntheticSource(width, height, fps)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, fps)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec)
+    raise ValueError(f"Unknown frame source '{spec}' (camera index, synthetic, image directory or video file)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe the capture modes of a camera")
+    parser.add_argument("index", type=int, nargs="?", default=0, help="camera index")
+    parser.add_argument("--latency-target", type=float, default=50.0, help="latency target in ms")
+    args = parser.parse_args()
+    negotiate_camera_mode(args.index, args.latency_target, reprobe=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Gesture Classifiers
+Trainable replacements for the hand-written gesture rules in hand.py.
+
+The rules compare raw normalized-image distances against fixed thresholds,
+so they drift with the user's hand size and distance from the camera. These
+classifiers work on landmarks translated to the wrist and scaled by the
+palm length instead, and are trained from recorded sessions.
+
+Models:
+- knn: k-nearest neighbours over standardized features
+- mlp: one hidden layer ReLU network trained with Adam
+
+Both are pure NumPy and classify whole batches at once. A predict() call
+costs roughly 50 us (mlp) to 70 us (knn, a few thousand samples), most of
+it fixed NumPy overhead rather than per-hand work, so classify all hands of
+a frame in one call. Train with:
+
+    python gesture_classifier.py train --model mlp -o gestures.npz \\
+        session1.npz session2.npz left_clicks.npz:LEFT_CLICK
+
+A session given as PATH:GESTURE labels every recorded hand with that
+gesture; otherwise the gestures recorded with the session are used. Load
+the result with `python hand.py --gesture-model gestures.npz`.
+"""
+
+import argparse
+
+import numpy as np
+
+FINGERTIP_IDS = [4, 8, 12, 16, 20]
+TIP_PAIRS = np.triu_indices(5, k=1)  # The 10 fingertip pairs
+FEATURE_SIZE = 21 * 2 + len(TIP_PAIRS[0])
+
+def landmark_features(landmarks):
+    """(N, FEATURE_SIZE) features of (N, 21, 3) or (21, 3) landmarks
+
+    x, y relative to the wrist and divided by the wrist to middle finger
+    MCP distance, followed by the scaled fingertip pair distances.
+    """
+    points = np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3)
+    xy = points[:, :, :2] - points[:, :1, :2]
+    scale = np.maximum(np.hypot(xy[:, 9, 0], xy[:, 9, 1]), 1e-6)
+    xy = xy / scale[:, None, None]
+    tips = xy[:, FINGERTIP_IDS]
+    deltas = tips[:, TIP_PAIRS[0]] - tips[:, TIP_PAIRS[1]]
+    distances = np.sqrt((deltas * deltas).sum(axis=-1))
+    return np.concatenate([xy.reshape(len(points), -1), distances], axis=1)
+
+class GestureClassifier:
+    """Base class: feature standardization, class names and persistence
+
+    Subclasses implement _fit(features, labels) and _scores(features) on
+    standardized features; labels are indices into self.classes (gesture
+    names such as "LEFT_CLICK").
+    """
+    kind = "base"
+
+    def __init__(self):
+        self.classes = []
+        self.mean = np.zeros(FEATURE_SIZE, dtype=np.float32)
+        self.std = np.ones(FEATURE_SIZE, dtype=np.float32)
+
+    def fit(self, landmarks, names):
+        """Train on (N, 21, 3) landmarks and their N gesture names"""
+        self.classes, labels = np.unique(np.asarray(names), return_inverse=True)
+        self.classes = [str(name) for name in self.classes]
+        features = landmark_features(landmarks)
+        self.mean = features.mean(axis=0)
+        self.std = np.maximum(features.std(axis=0), 1e-6)
+        self._fit((features - self.mean) / self.std, labels)
+        return self
+
+    def predict(self, landmarks):
+        """Class indices (N,) for (N, 21, 3) or (21, 3) landmarks"""
+        features = (landmark_features(landmarks) - self.mean) / self.std
+        return self._scores(features).argmax(axis=1)
+
+    def predict_names(self, landmarks):
+        """Gesture names (N,) for (N, 21, 3) or (21, 3) landmarks"""
+        return np.asarray(self.classes)[self.predict(landmarks)]
+
+    def _fit(self, features, labels):
+        raise NotImplementedError
+
+    def _scores(self, features):
+        raise NotImplementedError
+
+    def parameters(self):
+        """Model-specific arrays stored by save()"""
+        return {}
+
+    def save(self, path):
+        np.savez(path, kind=self.kind, classes=np.array(self.classes), mean=self.mean, std=self.std,
+                 **self.parameters())
+
+class KnnClassifier(GestureClassifier):
+    """k-nearest neighbours (squared Euclidean, majority vote)
+
+    Distances to all training samples come from one matrix product with
+    the precomputed sample norms, which is fast for the few thousand hands
+    a set of recorded sessions holds. The samples are also kept transposed
+    and contiguous: multiplying by a strided samples.T view is several times
+    slower once more than one hand is classified.
+    """
+    kind = "knn"
+
+    def __init__(self, k=5):
+        super().__init__()
+        self.k = k
+        self.samples = np.zeros((0, FEATURE_SIZE), dtype=np.float32)
+        self.labels = np.zeros(0, dtype=np.int64)
+        self.sample_norms = np.zeros(0, dtype=np.float32)
+        self.samples_t = self.samples.T.copy()
+
+    def _fit(self, features, labels):
+        self.samples = features.astype(np.float32)
+        self.labels = labels.astype(np.int64)
+        self.sample_norms = (self.samples * self.samples).sum(axis=1)
+        self.samples_t = self.samples.T.copy()
+
+    def _scores(self, features):
+        distances = self.sample_norms[None, :] - 2 * features @ self.samples_t
+        k = min(self.k, len(self.samples))
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        # Votes per class: (N, k, 1) neighbour labels against (classes,)
+        return (self.labels[nearest][:, :, None] == np.arange(len(self.classes))).sum(axis=1)
+
+    def parameters(self):
+        return {'k': self.k, 'samples': self.samples, 'labels': self.labels}
+
+class MlpClassifier(GestureClassifier):
+    """Single hidden layer ReLU network with a softmax output"""
+    kind = "mlp"
+
+    def __init__(self, hidden=32, epochs=300, learning_rate=0.01, batch_size=256, weight_decay=1e-4, seed=0):
+        super().__init__()
+        self.hidden = hidden
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.batch_size = batch_size
+        self.weight_decay = weight_decay
+        self.seed = seed
+        self.w1 = self.b1 = self.w2 = self.b2 = None
+
+    def _fit(self, features, labels):
+        rng = np.random.default_rng(self.seed)
+        classes = len(self.classes)
+        params = [
+            rng.normal(0, np.sqrt(2 / FEATURE_SIZE), (FEATURE_SIZE, self.hidden)).astype(np.float32),
+            np.zeros(self.hidden, dtype=np.float32),
+            rng.normal(0, np.sqrt(1 / self.hidden), (self.hidden, classes)).astype(np.float32),
+            np.zeros(classes, dtype=np.float32),
+        ]
+        # Adam state
+        moments = [np.zeros_like(param) for param in params]
+        velocities = [np.zeros_like(param) for param in params]
+        beta1, beta2, step = 0.9, 0.999, 0
+        targets = np.eye(classes, dtype=np.float32)[labels]
+
+        for _ in range(self.epochs):
+            order = rng.permutation(len(features))
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                x, target = features[batch], targets[batch]
+                w1, b1, w2, b2 = params
+
+                hidden = np.maximum(x @ w1 + b1, 0)
+                logits = hidden @ w2 + b2
+                probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+                probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+                error = (probabilities - target) / len(batch)
+                hidden_error = (error @ w2.T) * (hidden > 0)
+                gradients = [x.T @ hidden_error + self.weight_decay * w1, hidden_error.sum(axis=0),
+                             hidden.T @ error + self.weight_decay * w2, error.sum(axis=0)]
+
+                step += 1
+                for index, gradient in enumerate(gradients):
+                    moments[index] = beta1 * moments[index] + (1 - beta1) * gradient
+                    velocities[index] = beta2 * velocities[index] + (1 - beta2) * gradient * gradient
+                    corrected = moments[index] / (1 - beta1 ** step)
+                    params[index] -= self.learning_rate * corrected / (
+                        np.sqrt(velocities[index] / (1 - beta2 ** step)) + 1e-8)
+        self.w1, self.b1, self.w2, self.b2 = params
+
+    def _scores(self, features):
+        return np.maximum(features @ self.w1 + self.b1, 0) @ self.w2 + self.b2
+
+    def parameters(self):
+        return {'w1': self.w1, 'b1': self.b1, 'w2': self.w2, 'b2': self.b2}
+
+CLASSIFIERS = {
+    'knn': KnnClassifier,
+    'mlp': MlpClassifier,
+}
+
+def load_classifier(path):
+    """Load a classifier written by GestureClassifier.save()"""
+    with np.load(path) as data:
+        kind = str(data['kind'])
+        if kind not in CLASSIFIERS:
+            raise ValueError(f"Unknown gesture classifier '{kind}' in {path}")
+        classifier = CLASSIFIERS[kind]()
+        classifier.classes = [str(name) for name in data['classes']]
+        classifier.mean = data['mean']
+        classifier.std = data['std']
+        if kind == 'knn':
+            classifier.k = int(data['k'])
+            classifier._fit(data['samples'], data['labels'])
+        else:
+            classifier.w1, classifier.b1, classifier.w2, classifier.b2 = (
+                data['w1'], data['b1'], data['w2'], data['b2'])
+    return classifier
+
+def load_training_data(specs):
+    """(landmarks (N, 21, 3), gesture names (N,)) from PATH[:GESTURE] session specs"""
+    from hand import GESTURES_BY_CODE, HandGesture, Session
+
+    all_landmarks = []
+    all_names = []
+    for spec in specs:
+        path, _, label = spec.partition(':')
+        session = Session(path)
+        present = session.gestures >= 0
+        landmarks = session.landmarks[present]
+        if label:
+            names = np.full(len(landmarks), HandGesture[label.upper()].name)
+        else:
+            names = np.array([gesture.name for gesture in GESTURES_BY_CODE[session.gestures[present]]])
+        all_landmarks.append(landmarks)
+        all_names.append(names)
+    return np.concatenate(all_landmarks), np.concatenate(all_names)
+
+def accuracy(classifier, landmarks, names):
+    return float((classifier.predict_names(landmarks) == np.asarray(names)).mean())
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate a landmark gesture classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="train on recorded sessions")
+    train.add_argument("sessions", nargs="+", help="session .npz files, optionally PATH:GESTURE")
+    train.add_argument("--model", default="mlp", choices=list(CLASSIFIERS))
+    train.add_argument("--holdout", type=float, default=0.2, help="fraction of hands kept for validation")
+    train.add_argument("-o", "--output", required=True, help="model .npz path")
+
+    evaluate = commands.add_parser("evaluate", help="accuracy of a trained model on sessions")
+    evaluate.add_argument("model", help="model .npz path")
+    evaluate.add_argument("sessions", nargs="+", help="session .npz files, optionally PATH:GESTURE")
+    args = parser.parse_args()
+
+    landmarks, names = load_training_data(args.sessions)
+    if args.command == "evaluate":
+        classifier = load_classifier(args.model)
+        print(f"{classifier.kind}: {100 * accuracy(classifier, landmarks, names):.1f}% on {len(names)} hands")
+        return
+
+    order = np.random.default_rng(0).permutation(len(names))
+    split = int(len(order) * (1 - args.holdout))
+    train_rows, test_rows = order[:split], order[split:]
+    classifier = CLASSIFIERS[args.model]().fit(landmarks[train_rows], names[train_rows])
+    print(f"Trained {classifier.kind} on {len(train_rows)} hands, classes: {', '.join(classifier.classes)}")
+    if len(test_rows):
+        print(f"Validation accuracy: {100 * accuracy(classifier, landmarks[test_rows], names[test_rows]):.1f}% "
+              f"on {len(test_rows)} hands")
+    classifier.save(args.output)
+    print(f"Model written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -18,14 +18,21 @@ Version: 2.0
 """
 
 import cv2
-import mediapipe as mp
-import pyautogui
 import numpy as np
 import time
 import math
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import threading
+import signal
+import argparse
+import bisect
+import itertools
+import json
 from enum import Enum
+from input_backends import create_backend
+from frame_sources import create_source
+from gesture_classifier import load_classifier
 
 class HandGesture(Enum):
     """Enumeration of recognized hand gestures"""
@@ -45,43 +52,1940 @@ class HandGesture(Enum):
     DRAG_END = "drag_end"
     NONE = "none"
 
+# Landmark indices used by the gesture features
+FINGERTIP_IDS = [4, 8, 12, 16, 20]  # Thumb, Index, Middle, Ring, Pinky
+FINGER_PIP_IDS = [6, 10, 14, 18]    # PIP joints of Index, Middle, Ring, Pinky
+FINGER_BITS = 1 << np.arange(5)     # Finger mask bit of each finger
+
+def landmarks_to_array(landmarks):
+    """Convert MediaPipe landmarks to a (21, 3) float32 array of x, y, z
+
+    Accepts a NormalizedLandmarkList, its .landmark sequence, or an array
+    (returned unchanged, also when it is the .landmark attribute).
+    """
+    if hasattr(landmarks, 'landmark'):
+        landmarks = landmarks.landmark
+    if isinstance(landmarks, np.ndarray):
+        return landmarks
+    return np.fromiter((value for landmark in landmarks for value in (landmark.x, landmark.y, landmark.z)),
+                       dtype=np.float32, count=3 * len(landmarks)).reshape(-1, 3)
+
+def finger_states_of(coords):
+    """Up/down state of thumb, index, middle, ring and pinky from (21, 3) landmark lists
+
+    Thumb compares x against the IP joint, mirrored by hand orientation;
+    the other fingers compare each tip with its PIP joint.
+    """
+    thumb_x = coords[4][0]
+    states = [thumb_x > coords[3][0] if thumb_x > coords[17][0] else thumb_x < coords[3][0]]
+    for tip, pip in zip(FINGERTIP_IDS[1:], FINGER_PIP_IDS):
+        states.append(coords[tip][1] < coords[pip][1])
+    return states
+
+class HandFeatures:
+    """Gesture features of one hand, computed once per frame from a (21, 3) array
+
+    Recognition and the overlay share the same instance instead of reading
+    landmark objects attribute by attribute. Everything is scalar math on a
+    list copy of the points: for 21 landmarks NumPy's per-call overhead
+    costs more than the arithmetic (recognize_gestures_batch is the
+    vectorized path for many hands). Fingertip distances are computed on
+    demand, since a gesture needs at most two of them; fingers are indexed
+    thumb first.
+    """
+    __slots__ = ('points', 'coords', 'finger_states', 'finger_mask', 'fingers_up', 'thumb_pointing_up',
+                 'click_threshold', 'close_threshold')
+
+    def __init__(self, landmarks, click_threshold, close_threshold):
+        self.points = landmarks_to_array(landmarks)
+        self.coords = coords = self.points.tolist()
+        self.click_threshold = click_threshold
+        self.close_threshold = close_threshold
+        
+        states = finger_states_of(coords)
+        self.finger_states = states
+        self.finger_mask = states[0] | states[1] << 1 | states[2] << 2 | states[3] << 3 | states[4] << 4
+        self.fingers_up = sum(states)
+        self.thumb_pointing_up = coords[4][1] < coords[2][1]  # Thumb tip above thumb MCP joint
+
+    def tip_distance(self, finger, other):
+        """Normalized distance between two fingertips"""
+        tip = self.coords[FINGERTIP_IDS[finger]]
+        other_tip = self.coords[FINGERTIP_IDS[other]]
+        return math.hypot(tip[0] - other_tip[0], tip[1] - other_tip[1])
+
+    def touching(self, finger, other):
+        """True when two fingertips are within click_threshold"""
+        return self.tip_distance(finger, other) < self.click_threshold
+
+    def close(self, finger, other):
+        """True when two fingertips are within close_threshold"""
+        return self.tip_distance(finger, other) < self.close_threshold
+
+class FrameGrabber:
+    """Background camera reader that always hands out the newest frame
+
+    A dedicated thread keeps draining the camera into a single-slot buffer so
+    the driver queue never fills up with stale frames. The processing loop
+    receives whatever frame is newest when it asks; frames that were
+    overwritten before anyone read them are counted as dropped. A camera
+    that goes quiet (a slow first frame while it opens, a short USB stall)
+    is waited for; only a failed read ends the stream.
+    """
+
+    def __init__(self, cap, stall_warning=2.0):
+        self.cap = cap
+        self.stall_warning = stall_warning  # Seconds without a frame before a stall is reported
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.failed = False
+
+        # Single-slot buffer
+        self.frame = None
+        self.frame_time = 0.0
+        self.frame_seq = 0      # Sequence number of the frame in the slot
+        self.read_seq = 0       # Sequence number of the last frame handed out
+        self.last_read_time = 0.0  # Capture timestamp of the last frame handed out
+
+        # Statistics
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.stalls = 0
+
+    def start(self):
+        """Start the capture thread"""
+        self.running = True
+        self.thread = threading.Thread(target=self._capture_loop, name="FrameGrabber", daemon=True)
+        self.thread.start()
+        return self
+
+    def _capture_loop(self):
+        """Read frames as fast as the camera delivers them"""
+        while self.running:
+            ret, frame = self.cap.read()
+            timestamp = time.perf_counter()
+            with self.condition:
+                if not ret:
+                    self.failed = True
+                    self.condition.notify_all()
+                    break
+                # The previous frame was never picked up - it is being replaced
+                if self.frame_seq > self.read_seq:
+                    self.frames_dropped += 1
+                self.frame = frame
+                self.frame_time = timestamp
+                self.frame_seq += 1
+                self.frames_captured += 1
+                self.condition.notify_all()
+
+    def read(self, stop_event=None):
+        """Return (ret, frame) for the newest frame not yet handed out
+
+        Blocks until a new frame arrives, printing a note every stall_warning
+        seconds while the camera is quiet. Returns (False, None) when the
+        camera fails, the grabber is stopped or stop_event is set.
+        """
+        with self.condition:
+            start = time.perf_counter()
+            next_warning = self.stall_warning
+            while self.frame_seq <= self.read_seq and not self.failed and self.running:
+                if stop_event is not None and stop_event.is_set():
+                    return False, None
+                self.condition.wait(0.25)  # Wakes on a new frame; the timeout polls stop_event
+                waited = time.perf_counter() - start
+                if waited >= next_warning:
+                    if next_warning == self.stall_warning:
+                        self.stalls += 1
+                    print(f"No camera frame for {waited:.1f} s - still waiting")
+                    next_warning += self.stall_warning
+
+            if self.frame_seq <= self.read_seq:
+                return False, None
+
+            frame = self.frame
+            self.frame = None  # Hand ownership to the caller
+            self.read_seq = self.frame_seq
+            self.last_read_time = self.frame_time
+            return True, frame
+
+    def stop(self):
+        """Stop the capture thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def depth(self):
+        """Number of frames waiting to be picked up (0 or 1)"""
+        return 1 if self.frame_seq > self.read_seq else 0
+
+class LatencyHistogram:
+    """Fixed-memory histogram of durations with log-spaced buckets
+
+    Buckets span min_value..max_value seconds with buckets_per_decade
+    buckets per factor of ten (about 12% resolution by default); record()
+    is a bisect and an increment, so it is cheap enough for every frame.
+    """
+
+    def __init__(self, min_value=1e-5, max_value=10.0, buckets_per_decade=20):
+        decades = math.log10(max_value / min_value)
+        self.bounds = [min_value * 10 ** (i / buckets_per_decade)
+                       for i in range(int(decades * buckets_per_decade) + 1)]
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        target = self.count * percent / 100.0
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return min(self.bounds[min(index, len(self.bounds) - 1)], self.max)
+        return self.max
+
+    def summary(self):
+        """count, mean, p50, p95, p99 and max in milliseconds"""
+        return {
+            'count': self.count,
+            'mean_ms': 1000 * self.total / self.count if self.count else 0.0,
+            'p50_ms': 1000 * self.percentile(50),
+            'p95_ms': 1000 * self.percentile(95),
+            'p99_ms': 1000 * self.percentile(99),
+            'max_ms': 1000 * self.max,
+        }
+
+class StageProfiler:
+    """Per-stage latency histograms for the vision loop
+
+    Each stage keeps a cumulative histogram (reported on exit) and a window
+    histogram that is replaced after every periodic summary. Stages are
+    recorded from the inference, actuation and input worker threads while
+    the main thread renders and reports, so recording and reading hold a
+    lock; a window report swaps in fresh histograms under the lock and
+    summarizes the old ones, which nothing records into any more.
+    """
+    STAGES = ('capture', 'frame_age', 'flip', 'convert', 'inference', 'recognition',
+              'actuation', 'input_queue', 'injection', 'drawing', 'display', 'end_to_end')
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.total = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.window = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.lock = threading.Lock()
+
+    def record(self, stage, duration):
+        """Add one duration in seconds"""
+        if self.enabled:
+            with self.lock:
+                self.total[stage].record(duration)
+                self.window[stage].record(duration)
+
+    def report(self, cumulative=True):
+        """Summaries of all stages that saw samples"""
+        with self.lock:
+            histograms = self.total if cumulative else self.window
+            return {stage: histogram.summary() for stage, histogram in histograms.items() if histogram.count}
+
+    def take_window(self):
+        """Summaries of the current window, starting a new one"""
+        with self.lock:
+            window = self.window
+            self.window = {stage: LatencyHistogram() for stage in self.STAGES}
+        return {stage: histogram.summary() for stage, histogram in window.items() if histogram.count}
+
+    def print_report(self, title, cumulative=True):
+        """Print a p50/p95/p99/max table; window reports start a new window"""
+        report = self.report() if cumulative else self.take_window()
+        if not report:
+            return
+        print(f"--- {title} (ms) ---")
+        print(f"  {'stage':<12} {'count':>7} {'mean':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}")
+        for stage, values in report.items():
+            print(f"  {stage:<12} {values['count']:>7} {values['mean_ms']:>7.2f} {values['p50_ms']:>7.2f} "
+                  f"{values['p95_ms']:>7.2f} {values['p99_ms']:>7.2f} {values['max_ms']:>7.2f}")
+
+    def save_report(self, path, extra=None):
+        """Write the cumulative report as JSON, with optional extra top-level entries"""
+        report = self.report()
+        report.update(extra or {})
+        with open(path, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+
+def mediapipe_solutions():
+    """(hands, drawing_utils) MediaPipe solution modules
+
+    MediaPipe takes about a second to import, so it is only imported when
+    a mode needs hand tracking or landmark drawing; offline uses such as
+    session replay and classifier training never load it.
+    """
+    import mediapipe as mp
+    return mp.solutions.hands, mp.solutions.drawing_utils
+
+def load_hand_model(max_hands=1, warmup_size=256):
+    """Create MediaPipe Hands and run one warm-up inference on a blank frame
+
+    The first process() call initializes the inference graph, which would
+    otherwise stall the first real frame. Returns (hands, warm-up seconds).
+    """
+    mp_hands, _ = mediapipe_solutions()
+    hands = mp_hands.Hands(
+        static_image_mode=False,
+        max_num_hands=max_hands,
+        min_detection_confidence=0.8,
+        min_tracking_confidence=0.8
+    )
+    start = time.perf_counter()
+    hands.process(np.zeros((warmup_size, warmup_size, 3), dtype=np.uint8))
+    return hands, time.perf_counter() - start
+
+class StartupTimer:
+    """Startup step durations and the time to the first frame and cursor move
+
+    Steps are timed with measure() (from any thread); mark() records the
+    first occurrence of a milestone. All times are seconds since the timer
+    was created, at the start of HandMouseController construction.
+    """
+    MILESTONES = ('ready', 'first_frame', 'first_cursor_move')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.steps = {}       # Step name -> seconds
+        self.milestones = {}  # Milestone name -> seconds since start
+
+    def measure(self, name, function, *args, **kwargs):
+        """Call function, recording its duration as step name"""
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.steps[name] = time.perf_counter() - start
+
+    def mark(self, milestone):
+        """Record a milestone the first time it is reached; True if this was the first time"""
+        if milestone in self.milestones:
+            return False
+        self.milestones[milestone] = time.perf_counter() - self.start
+        return True
+
+    def report(self):
+        """Milliseconds per step and milestone"""
+        return {
+            'steps_ms': {name: 1000 * seconds for name, seconds in self.steps.items()},
+            'milestones_ms': {name: 1000 * seconds for name, seconds in self.milestones.items()},
+        }
+
+    def summary(self):
+        """One-line summary of the steps and milestones"""
+        steps = ", ".join(f"{name} {1000 * seconds:.0f} ms" for name, seconds in self.steps.items())
+        milestones = ", ".join(f"{name.replace('_', ' ')} {1000 * self.milestones[name]:.0f} ms"
+                               for name in self.MILESTONES if name in self.milestones)
+        return f"Startup: {steps or 'no steps'}; {milestones or 'no milestones'}"
+
+class FramePacket:
+    """Everything the pipeline stages know about one camera frame"""
+    __slots__ = ('frame', 'capture_time', 'frame_id', 'hands', 'handedness', 'tracks', 'lost_tracks',
+                 'removed_tracks', 'roi', 'inferred', 'predicted_tip')
+
+    def __init__(self, frame, capture_time, frame_id=0):
+        self.frame = frame                # Unmirrored BGR camera frame
+        self.capture_time = capture_time  # time.perf_counter() at capture
+        self.frame_id = frame_id          # Sequence number assigned by the frame source
+        self.hands = []                   # List of (hand_landmarks, features, gesture)
+        self.handedness = []              # "Left", "Right" or None of each entry in hands
+        self.tracks = []                  # HandTrack of each entry in hands
+        self.lost_tracks = []             # Live tracks not seen in this frame
+        self.removed_tracks = []          # Tracks dropped in this frame
+        self.roi = None                   # Tracking crop used for the next frame
+        self.inferred = True              # False when hands are carried over from an earlier frame
+        self.predicted_tip = None         # Extrapolated (x, y) index tip on skipped frames
+
+class StageQueue:
+    """Bounded queue joining two pipeline stages
+
+    Policies when the queue is full:
+    - BLOCK: the producer waits for space (backpressure)
+    - DROP_OLDEST: the oldest queued item is discarded
+    - DROP_NEWEST: the incoming item is discarded
+    """
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+
+    def __init__(self, name, maxsize=2, policy=DROP_OLDEST):
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        """Queue an item according to the drop policy; returns False if it was dropped"""
+        with self.condition:
+            if self.policy == StageQueue.BLOCK:
+                while len(self.items) >= self.maxsize and not self.closed:
+                    self.condition.wait(0.1)
+                if self.closed:
+                    return False
+            elif len(self.items) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == StageQueue.DROP_NEWEST:
+                    return False
+                self.items.popleft()
+
+            self.items.append(item)
+            self.put_count += 1
+            self.condition.notify_all()
+            return True
+
+    def get(self, timeout=0.1):
+        """Return the next item, or None if nothing arrived within timeout"""
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        """Wake up every waiting producer and consumer"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def depth(self):
+        """Number of queued items"""
+        return len(self.items)
+
+class PipelineStage:
+    """Worker that pulls items from a source, processes them and fans them out
+
+    The source is any callable returning the next item or None. When
+    no thread is started the stage can be driven with step() from the
+    caller's own loop (used for the render stage, which must own the
+    HighGUI window on the main thread).
+    """
+
+    def __init__(self, name, source, func, outputs=(), stop_event=None):
+        self.name = name
+        self.source = source
+        self.func = func
+        self.outputs = list(outputs)
+        self.stop_event = stop_event or threading.Event()
+        self.thread = None
+
+        # Statistics
+        self.processed = 0
+        self.busy_time = 0.0
+        self.last_stats_time = time.perf_counter()
+        self.last_stats_count = 0
+
+    def start(self):
+        """Run the stage on its own thread"""
+        self.thread = threading.Thread(target=self._loop, name=f"Stage-{self.name}", daemon=True)
+        self.thread.start()
+        return self
+
+    def step(self):
+        """Process at most one item; returns the stage function's result"""
+        item = self.source()
+        if item is None:
+            return None
+
+        start = time.perf_counter()
+        result = self.func(item)
+        self.busy_time += time.perf_counter() - start
+        self.processed += 1
+
+        if result is not None:
+            for output in self.outputs:
+                output.put(result)
+        return result
+
+    def _loop(self):
+        try:
+            while not self.stop_event.is_set():
+                self.step()
+        except Exception as e:
+            print(f"Error in {self.name} stage: {e}")
+            self.stop_event.set()
+
+    def join(self, timeout=1.0):
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def throughput(self):
+        """Items per second since the previous call"""
+        now = time.perf_counter()
+        elapsed = now - self.last_stats_time
+        rate = (self.processed - self.last_stats_count) / elapsed if elapsed > 0 else 0.0
+        self.last_stats_time = now
+        self.last_stats_count = self.processed
+        return rate
+
+class RoiHandTracker:
+    """Runs MediaPipe on a small crop around the previously found hand
+
+    The bounding box of the last detected landmarks is padded, made square,
+    cropped out of the frame and resized to input_size x input_size before
+    colour conversion and inference. Landmarks are then mapped back to
+    full-frame normalized coordinates in place, so callers cannot tell the
+    difference. When a hand is lost (the crop finds fewer hands than the
+    last full-frame search) or every refresh_interval frames, so new hands
+    entering the view are still found, a full-frame search is run.
+
+    Frames are the unmirrored camera images. The crop and the RGB copies
+    are written into buffers reused across frames, and with mirror set the
+    landmarks and handedness are mirrored afterwards (in the same pass that
+    maps the crop back), so no flipped copy of the frame is ever made. roi
+    stays in camera pixels. Full-frame searches run on the frame downscaled
+    by inference_scale (set by QualityGovernor, like set_input_size()).
+
+    Off by default (HandMouseController roi_tracking): MediaPipe Hands in
+    video mode already tracks its own region of interest between frames,
+    and feeding it crops that move from frame to frame, mixed with
+    full-frame fallbacks, has not been shown to be faster or as accurate.
+    Enable it with --roi-tracking to measure on a given machine.
+    """
+
+    def __init__(self, hands, input_size=256, padding=0.4, refresh_interval=30, enabled=True, mirror=True):
+        self.hands = hands
+        self.input_size = input_size
+        self.padding = padding              # Fraction of the box size added on each side
+        self.refresh_interval = refresh_interval
+        self.enabled = enabled
+        self.mirror = mirror                # Return landmarks in mirrored (preview) coordinates
+        self.inference_scale = 1.0          # Downscale factor for full-frame searches
+        self.roi = None                     # (x0, y0, x1, y1) in camera pixels
+        self.frames_since_full = 0
+        self.expected_hands = 0             # Hands found by the last full-frame search
+        
+        # Destination buffers reused by every frame
+        self.crop_buffer = np.empty((input_size, input_size, 3), dtype=np.uint8)
+        self.crop_rgb = np.empty_like(self.crop_buffer)
+        self.frame_small = None             # Downscaled frame (inference_scale < 1)
+        self.frame_rgb = None               # Allocated for the first full-frame search
+        
+        # Time spent in the last process() call
+        self.last_convert_time = 0.0    # Crop, resize and colour conversion
+        self.last_inference_time = 0.0  # hands.process
+        
+        # Statistics
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.tracking_lost = 0
+
+    def process(self, frame):
+        """Run hand detection on an unmirrored BGR frame, returning MediaPipe results"""
+        height, width = frame.shape[:2]
+        self.last_convert_time = self.last_inference_time = 0.0
+        
+        if self.enabled and self.roi is not None and self.frames_since_full < self.refresh_interval:
+            x0, y0, x1, y1 = self.roi
+            start = time.perf_counter()
+            cv2.resize(frame[y0:y1, x0:x1], (self.input_size, self.input_size), dst=self.crop_buffer,
+                       interpolation=cv2.INTER_LINEAR)
+            cv2.cvtColor(self.crop_buffer, cv2.COLOR_BGR2RGB, dst=self.crop_rgb)
+            converted = time.perf_counter()
+            results = self.hands.process(self.crop_rgb)
+            self.last_convert_time += converted - start
+            self.last_inference_time += time.perf_counter() - converted
+            
+            if results.multi_hand_landmarks and len(results.multi_hand_landmarks) >= self.expected_hands:
+                self.map_to_frame(results.multi_hand_landmarks, self.roi, width, height, self.mirror)
+                self.roi = self.compute_roi(results.multi_hand_landmarks, width, height)
+                self.mirror_handedness(results)
+                self.frames_since_full += 1
+                self.roi_frames += 1
+                return results
+            
+            # A hand left the crop - search the whole frame this time
+            self.tracking_lost += 1
+        
+        start = time.perf_counter()
+        image = frame
+        if self.inference_scale < 1.0:
+            # Normalized landmarks do not depend on the resolution inferred at
+            size = (max(1, round(width * self.inference_scale)), max(1, round(height * self.inference_scale)))
+            if self.frame_small is None or self.frame_small.shape[:2] != (size[1], size[0]):
+                self.frame_small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            image = cv2.resize(frame, size, dst=self.frame_small, interpolation=cv2.INTER_LINEAR)
+        if self.frame_rgb is None or self.frame_rgb.shape != image.shape:
+            self.frame_rgb = np.empty_like(image)
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self.frame_rgb)
+        converted = time.perf_counter()
+        results = self.hands.process(self.frame_rgb)
+        self.last_convert_time += converted - start
+        self.last_inference_time += time.perf_counter() - converted
+        self.full_frames += 1
+        self.frames_since_full = 0
+        if results.multi_hand_landmarks:
+            if self.mirror:
+                self.map_to_frame(results.multi_hand_landmarks, (0, 0, width, height), width, height, True)
+            self.roi = self.compute_roi(results.multi_hand_landmarks, width, height)
+            self.mirror_handedness(results)
+            self.expected_hands = len(results.multi_hand_landmarks)
+        else:
+            self.roi = None
+            self.expected_hands = 0
+        return results
+
+    def set_input_size(self, input_size):
+        """Change the side of the tracking crop"""
+        if input_size != self.input_size:
+            self.input_size = input_size
+            self.crop_buffer = np.empty((input_size, input_size, 3), dtype=np.uint8)
+            self.crop_rgb = np.empty_like(self.crop_buffer)
+
+    @staticmethod
+    def map_to_frame(multi_hand_landmarks, roi, width, height, mirror=False):
+        """Convert crop-normalized landmarks to full-frame normalized coordinates
+
+        With mirror the x coordinates are also flipped to the mirrored view.
+        """
+        x0, y0, x1, y1 = roi
+        crop_width = x1 - x0
+        crop_height = y1 - y0
+        for hand_landmarks in multi_hand_landmarks:
+            for landmark in hand_landmarks.landmark:
+                x = (x0 + landmark.x * crop_width) / width
+                landmark.x = 1.0 - x if mirror else x
+                landmark.y = (y0 + landmark.y * crop_height) / height
+                landmark.z = landmark.z * crop_width / width
+
+    def mirror_handedness(self, results):
+        """Swap Left/Right labels: MediaPipe assumes its input is already mirrored"""
+        if not self.mirror or not getattr(results, 'multi_handedness', None):
+            return
+        for handedness in results.multi_handedness:
+            for classification in handedness.classification:
+                classification.label = 'Left' if classification.label == 'Right' else 'Right'
+
+    def compute_roi(self, multi_hand_landmarks, width, height):
+        """Padded square camera pixel box around all detected hands, kept inside the frame"""
+        xs = [landmark.x for hand in multi_hand_landmarks for landmark in hand.landmark]
+        ys = [landmark.y for hand in multi_hand_landmarks for landmark in hand.landmark]
+        
+        box_x0, box_x1 = min(xs) * width, max(xs) * width
+        if self.mirror:
+            # Landmarks are already mirrored; the box is cut from the camera frame
+            box_x0, box_x1 = width - box_x1, width - box_x0
+        box_y0, box_y1 = min(ys) * height, max(ys) * height
+        side = max(box_x1 - box_x0, box_y1 - box_y0) * (1 + 2 * self.padding)
+        side = int(min(max(side, self.input_size / 2), width, height))
+        
+        center_x = (box_x0 + box_x1) / 2
+        center_y = (box_y0 + box_y1) / 2
+        
+        # Shift (rather than shrink) the square so it stays inside the frame
+        x0 = int(max(0, min(width - side, center_x - side / 2)))
+        y0 = int(max(0, min(height - side, center_y - side / 2)))
+        return x0, y0, x0 + side, y0 + side
+
+class TipPredictor:
+    """Constant-velocity Kalman filter for the index fingertip
+
+    Each axis keeps a [position, velocity] state in normalized frame
+    coordinates. update() feeds an inferred landmark position; predict()
+    extrapolates the filtered state to any later timestamp without
+    changing it, which fills in the frames that skip inference.
+    """
+
+    def __init__(self, process_noise=50.0, measurement_noise=1e-5):
+        self.process_noise = process_noise          # White acceleration noise
+        self.measurement_noise = measurement_noise  # Landmark jitter variance
+        self.reset()
+
+    def reset(self):
+        """Forget the current track"""
+        self.initialized = False
+        self.last_time = 0.0
+        # Per-axis state: [position, velocity, P00, P01, P11]
+        self.axes = [[0.0, 0.0, 1.0, 0.0, 1.0], [0.0, 0.0, 1.0, 0.0, 1.0]]
+
+    def update(self, x, y, timestamp):
+        """Correct the state with a measured position"""
+        if not self.initialized:
+            self.axes = [[x, 0.0, self.measurement_noise, 0.0, 1.0],
+                         [y, 0.0, self.measurement_noise, 0.0, 1.0]]
+            self.last_time = timestamp
+            self.initialized = True
+            return
+        
+        dt = max(timestamp - self.last_time, 1e-3)
+        self.last_time = timestamp
+        q = self.process_noise
+        for axis, measured in zip(self.axes, (x, y)):
+            position, velocity, p00, p01, p11 = axis
+            
+            # Predict
+            position += velocity * dt
+            p00 += 2 * dt * p01 + dt * dt * p11 + q * dt ** 3 / 3
+            p01 += dt * p11 + q * dt ** 2 / 2
+            p11 += q * dt
+            
+            # Correct
+            innovation_var = p00 + self.measurement_noise
+            gain_position = p00 / innovation_var
+            gain_velocity = p01 / innovation_var
+            residual = measured - position
+            position += gain_position * residual
+            velocity += gain_velocity * residual
+            p11 -= gain_velocity * p01
+            p00 *= 1 - gain_position
+            p01 *= 1 - gain_position
+            
+            axis[:] = position, velocity, p00, p01, p11
+
+    def predict(self, timestamp):
+        """Extrapolated (x, y) at timestamp"""
+        dt = timestamp - self.last_time
+        return tuple(axis[0] + axis[1] * dt for axis in self.axes)
+
+    def speed(self):
+        """Fingertip speed in normalized units per second"""
+        if not self.initialized:
+            return 0.0
+        return math.hypot(self.axes[0][1], self.axes[1][1])
+
+class InferenceScheduler:
+    """Decides which frames get landmark inference
+
+    Inference runs on every Nth frame, or immediately when the tracked hand
+    moves faster than motion_threshold. N follows the measured inference
+    time so the amortized per-frame cost stays inside frame_budget.
+    """
+
+    def __init__(self, frame_budget=1 / 30, max_interval=4, motion_threshold=1.5, enabled=True):
+        self.frame_budget = frame_budget          # Seconds available per camera frame
+        self.max_interval = max_interval
+        self.motion_threshold = motion_threshold  # Normalized units per second
+        self.enabled = enabled
+        self.interval = 1
+        self.inference_time = 0.0                 # Moving average in seconds
+        self.frames_since_inference = 0
+        
+        # Statistics
+        self.inferred_frames = 0
+        self.skipped_frames = 0
+
+    def should_infer(self, speed):
+        """True if this frame should run inference"""
+        self.frames_since_inference += 1
+        if (not self.enabled or self.frames_since_inference >= self.interval
+                or speed > self.motion_threshold):
+            self.frames_since_inference = 0
+            self.inferred_frames += 1
+            return True
+        self.skipped_frames += 1
+        return False
+
+    def record_inference(self, duration):
+        """Update the inference cost estimate and re-derive N"""
+        if self.inference_time == 0.0:
+            self.inference_time = duration
+        else:
+            self.inference_time += 0.1 * (duration - self.inference_time)
+        self.interval = max(1, min(self.max_interval,
+                                   math.ceil(self.inference_time / self.frame_budget)))
+
+class QualityLevel:
+    """One step of the quality ladder walked by QualityGovernor
+
+    inference_scale: full-frame searches run on the frame downscaled by this factor
+    roi_size: side in pixels of the crop inferred while a hand is tracked
+    max_interval: most frames the InferenceScheduler may go without inference
+    overlay_rate: overlay text refreshes per second (capped by the configured rate)
+    """
+    __slots__ = ('name', 'inference_scale', 'roi_size', 'max_interval', 'overlay_rate')
+
+    def __init__(self, name, inference_scale, roi_size, max_interval, overlay_rate):
+        self.name = name
+        self.inference_scale = inference_scale
+        self.roi_size = roi_size
+        self.max_interval = max_interval
+        self.overlay_rate = overlay_rate
+
+# Highest quality first; the first level matches the fixed settings used without a governor
+QUALITY_LEVELS = [
+    QualityLevel('full', 1.0, 256, 4, 15.0),
+    QualityLevel('high', 0.75, 224, 4, 10.0),
+    QualityLevel('medium', 0.5, 192, 6, 8.0),
+    QualityLevel('low', 0.5, 160, 8, 5.0),
+    QualityLevel('minimum', 0.35, 128, 10, 2.0),
+]
+
+class QualityGovernor:
+    """Steps through QUALITY_LEVELS to hold a target frame rate
+
+    record() takes the processing time of every frame. After each window of
+    frames the mean (the amortized cost, skipped frames included) is compared
+    with the frame budget of target_fps:
+    - above budget: drop one level right away
+    - below budget * upgrade_ratio for upgrade_windows windows in a row: go up one level
+    The gap between the two thresholds, the run of windows needed to go up
+    and the settle window ignored after every change keep the level from
+    flapping. apply(level) is called for every change, and each change is
+    printed and kept in changes.
+    """
+
+    def __init__(self, apply, target_fps=30.0, levels=QUALITY_LEVELS, window=30, upgrade_ratio=0.6,
+                 upgrade_windows=3, settle_windows=1, enabled=True):
+        self.apply = apply
+        self.frame_budget = 1.0 / target_fps
+        self.levels = levels
+        self.window = window                    # Frames per decision
+        self.upgrade_ratio = upgrade_ratio
+        self.upgrade_windows = upgrade_windows
+        self.settle_windows = settle_windows
+        self.enabled = enabled
+        self.level = 0                          # Index into levels
+        self.window_total = 0.0
+        self.window_frames = 0
+        self.fast_windows = 0                   # Consecutive windows under the upgrade threshold
+        self.settling = 0                       # Windows left to ignore after a change
+        self.changes = []                       # (frame, from name, to name, mean ms)
+        self.frames = 0
+        self.level_frames = [0] * len(levels)   # Frames spent at each level
+
+    @property
+    def current(self):
+        return self.levels[self.level]
+
+    def record(self, duration):
+        """Add one frame's processing time in seconds"""
+        if not self.enabled:
+            return
+        self.frames += 1
+        self.level_frames[self.level] += 1
+        self.window_total += duration
+        self.window_frames += 1
+        if self.window_frames < self.window:
+            return
+        
+        mean = self.window_total / self.window_frames
+        self.window_total = 0.0
+        self.window_frames = 0
+        if self.settling:
+            self.settling -= 1
+            return
+        
+        if mean > self.frame_budget:
+            self.fast_windows = 0
+            if self.level < len(self.levels) - 1:
+                self.change(self.level + 1, mean)
+        elif mean < self.frame_budget * self.upgrade_ratio:
+            self.fast_windows += 1
+            if self.fast_windows >= self.upgrade_windows and self.level > 0:
+                self.change(self.level - 1, mean)
+        else:
+            self.fast_windows = 0
+
+    def change(self, level, mean):
+        previous = self.current
+        self.level = level
+        self.fast_windows = 0
+        self.settling = self.settle_windows
+        self.changes.append((self.frames, previous.name, self.current.name, 1000 * mean))
+        print(f"Quality: {previous.name} -> {self.current.name} (frame time {1000 * mean:.1f} ms, "
+              f"budget {1000 * self.frame_budget:.1f} ms)")
+        self.apply(self.current)
+
+    def report(self):
+        """Final level, changes and the share of frames spent at each level"""
+        return {
+            'level': self.current.name,
+            'changes': [{'frame': frame, 'from': previous, 'to': level, 'frame_time_ms': mean}
+                        for frame, previous, level, mean in self.changes],
+            'frames_per_level': {level.name: frames for level, frames in zip(self.levels, self.level_frames)},
+        }
+
+class CursorFilter:
+    """Incremental cursor smoothing filter (pass-through base class)
+
+    filter() takes a raw screen position and the frame timestamp in seconds
+    and returns the smoothed position. Implementations keep a constant
+    amount of state and do not allocate per call.
+    """
+    name = "none"
+
+    def reset(self):
+        """Forget all history"""
+
+    def filter(self, x, y, timestamp):
+        return x, y
+
+def smoothing_alpha(cutoff, dt):
+    """Exponential smoothing factor for a cutoff frequency (Hz) and time step"""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class EmaFilter(CursorFilter):
+    """Exponential moving average with a fixed time constant"""
+    name = "ema"
+
+    def __init__(self, time_constant=0.05):
+        self.time_constant = time_constant  # Seconds
+        self.reset()
+
+    def reset(self):
+        self.x = self.y = None
+        self.last_time = 0.0
+
+    def filter(self, x, y, timestamp):
+        if self.x is None:
+            self.x, self.y, self.last_time = x, y, timestamp
+            return x, y
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            return self.x, self.y
+        self.last_time = timestamp
+        alpha = 1.0 - math.exp(-dt / self.time_constant)
+        self.x += alpha * (x - self.x)
+        self.y += alpha * (y - self.y)
+        return self.x, self.y
+
+class OneEuroFilter(CursorFilter):
+    """One Euro filter: low cutoff (less jitter) at rest, higher cutoff (less lag) when moving fast
+
+    Casiez et al., "1 Euro Filter: A Simple Speed-based Low-pass Filter for
+    Noisy Input in Interactive Systems", CHI 2012.
+    """
+    name = "one_euro"
+
+    def __init__(self, min_cutoff=1.0, beta=0.005, derivative_cutoff=1.0):
+        self.min_cutoff = min_cutoff              # Hz at rest
+        self.beta = beta                          # Cutoff increase per pixel/second
+        self.derivative_cutoff = derivative_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x = self.y = None
+        self.dx = self.dy = 0.0
+        self.last_time = 0.0
+
+    def filter(self, x, y, timestamp):
+        if self.x is None:
+            self.x, self.y, self.last_time = x, y, timestamp
+            return x, y
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            return self.x, self.y
+        self.last_time = timestamp
+        
+        # Smoothed speed
+        alpha_d = smoothing_alpha(self.derivative_cutoff, dt)
+        self.dx += alpha_d * ((x - self.x) / dt - self.dx)
+        self.dy += alpha_d * ((y - self.y) / dt - self.dy)
+        
+        # Speed-adaptive cutoff
+        cutoff = self.min_cutoff + self.beta * math.hypot(self.dx, self.dy)
+        alpha = smoothing_alpha(cutoff, dt)
+        self.x += alpha * (x - self.x)
+        self.y += alpha * (y - self.y)
+        return self.x, self.y
+
+class DoubleExponentialFilter(CursorFilter):
+    """Holt double-exponential smoothing: tracks level and trend to cut lag on steady motion"""
+    name = "double_exponential"
+
+    def __init__(self, alpha=0.5, trend_alpha=0.3):
+        self.alpha = alpha              # Level smoothing per frame
+        self.trend_alpha = trend_alpha  # Trend smoothing per frame
+        self.reset()
+
+    def reset(self):
+        self.x = self.y = None
+        self.trend_x = self.trend_y = 0.0  # Pixels per second
+        self.last_time = 0.0
+
+    def filter(self, x, y, timestamp):
+        if self.x is None:
+            self.x, self.y, self.last_time = x, y, timestamp
+            return x, y
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            return self.x, self.y
+        self.last_time = timestamp
+        
+        previous_x, previous_y = self.x, self.y
+        self.x = self.alpha * x + (1 - self.alpha) * (previous_x + self.trend_x * dt)
+        self.y = self.alpha * y + (1 - self.alpha) * (previous_y + self.trend_y * dt)
+        self.trend_x += self.trend_alpha * ((self.x - previous_x) / dt - self.trend_x)
+        self.trend_y += self.trend_alpha * ((self.y - previous_y) / dt - self.trend_y)
+        return self.x, self.y
+
+class WeightedWindowFilter(CursorFilter):
+    """Linearly weighted average of the last positions (the original smoothing)"""
+    name = "weighted_window"
+
+    def __init__(self, window=5):
+        self.history = deque(maxlen=window)
+
+    def reset(self):
+        self.history.clear()
+
+    def filter(self, x, y, timestamp):
+        self.history.append((x, y))
+        
+        if len(self.history) < 2:
+            return x, y
+        
+        # Weighted average with recent positions having more influence
+        weights = np.linspace(0.1, 1.0, len(self.history))
+        weights /= weights.sum()
+        
+        smooth_x = sum(pos[0] * weight for pos, weight in zip(self.history, weights))
+        smooth_y = sum(pos[1] * weight for pos, weight in zip(self.history, weights))
+        return smooth_x, smooth_y
+
+class LatencyCompensator:
+    """Extrapolates the smoothed cursor forward by the measured pipeline latency
+
+    Velocity and acceleration come from the last three timestamped cursor
+    positions. The lead time is the moving average of the delay between
+    frame capture and cursor output, capped at max_lead. To avoid overshoot
+    when the finger stops, no lead is applied below stop_speed or while the
+    hand brakes hard or reverses, and the extrapolated offset is limited to
+    max_offset pixels.
+    """
+
+    def __init__(self, max_lead=0.12, max_offset=120, stop_speed=150.0, brake_ratio=0.6):
+        self.max_lead = max_lead          # Seconds
+        self.max_offset = max_offset      # Pixels
+        self.stop_speed = stop_speed      # Pixels per second
+        self.brake_ratio = brake_ratio    # Speed drop between samples that counts as a sudden stop
+        self.history = deque(maxlen=3)    # (timestamp, x, y)
+        self.latency = 0.0                # Moving average, seconds
+        
+        # Statistics
+        self.hidden_total = 0.0
+        self.predictions = 0
+
+    def reset(self):
+        """Forget the motion history"""
+        self.history.clear()
+
+    def observe_latency(self, capture_time, now=None):
+        """Update the capture-to-output latency estimate"""
+        latency = (time.perf_counter() if now is None else now) - capture_time
+        self.latency = latency if self.latency == 0.0 else self.latency + 0.1 * (latency - self.latency)
+
+    def predict(self, x, y, timestamp, width, height):
+        """Position extrapolated by the current lead time, clamped to the screen"""
+        if self.history and timestamp <= self.history[-1][0]:
+            return x, y
+        self.history.append((timestamp, x, y))
+        if len(self.history) < 3:
+            return x, y
+        
+        (t0, x0, y0), (t1, x1, y1), (t2, x2, y2) = self.history
+        vx1, vy1 = (x1 - x0) / (t1 - t0), (y1 - y0) / (t1 - t0)
+        vx2, vy2 = (x2 - x1) / (t2 - t1), (y2 - y1) / (t2 - t1)
+        speed_before = math.hypot(vx1, vy1)
+        speed = math.hypot(vx2, vy2)
+        
+        # Overshoot guard: hold still when stopped, braking or reversing
+        if (speed < self.stop_speed or speed < self.brake_ratio * speed_before
+                or vx1 * vx2 + vy1 * vy2 < 0):
+            return x, y
+        
+        lead = min(self.latency, self.max_lead)
+        ax = (vx2 - vx1) / ((t2 - t0) / 2)
+        ay = (vy2 - vy1) / ((t2 - t0) / 2)
+        offset_x = vx2 * lead + 0.5 * ax * lead * lead
+        offset_y = vy2 * lead + 0.5 * ay * lead * lead
+        
+        offset = math.hypot(offset_x, offset_y)
+        if offset > self.max_offset:
+            offset_x *= self.max_offset / offset
+            offset_y *= self.max_offset / offset
+        
+        self.hidden_total += lead
+        self.predictions += 1
+        return (max(0, min(width - 1, x + offset_x)),
+                max(0, min(height - 1, y + offset_y)))
+
+    def hidden_latency_ms(self):
+        """Average latency hidden per predicted cursor update"""
+        return 1000 * self.hidden_total / self.predictions if self.predictions else 0.0
+
+# Cursor filters selectable by name
+CURSOR_FILTERS = {
+    cursor_filter.name: cursor_filter
+    for cursor_filter in (OneEuroFilter, EmaFilter, DoubleExponentialFilter, WeightedWindowFilter, CursorFilter)
+}
+
+# Lookup from integer gesture codes (index into HandGesture) to members
+GESTURE_CODES = {gesture: code for code, gesture in enumerate(HandGesture)}
+GESTURES_BY_CODE = np.array(list(HandGesture), dtype=object)
+
+# Distance/direction predicates a gesture rule can require, evaluated on
+# HandFeatures (single hand) or on the arrays of recognize_gestures_batch
+GESTURE_PREDICATES = {
+    'thumb_index_touch': lambda features: features.touching(0, 1),
+    'thumb_middle_touch': lambda features: features.touching(0, 2),
+    'thumb_up': lambda features: features.thumb_pointing_up,
+}
+
+class GestureRule:
+    """One row of the gesture table
+
+    fingers is a pattern over thumb, index, middle, ring and pinky: '1'
+    (up), '0' (down) or '*' (either). predicates names GESTURE_PREDICATES
+    entries that must hold; a leading '!' requires the predicate to be false.
+    """
+    __slots__ = ('gesture', 'fingers', 'predicates', 'masks')
+
+    def __init__(self, gesture, fingers, *predicates):
+        self.gesture = gesture
+        self.fingers = fingers
+        self.predicates = tuple((name.lstrip('!'), not name.startswith('!')) for name in predicates)
+        for name, _ in self.predicates:
+            if name not in GESTURE_PREDICATES:
+                raise ValueError(f"Unknown gesture predicate '{name}'")
+        # Finger masks (bit i = finger i up) this rule covers
+        self.masks = [mask for mask in range(32)
+                      if all(pattern == '*' or int(pattern) == (mask >> bit) & 1
+                             for bit, pattern in enumerate(fingers))]
+
+    def conflicts_with(self, other):
+        """True when no hand can satisfy both rules' predicates"""
+        return any((name, not expected) in other.predicates for name, expected in self.predicates)
+
+    def matches(self, values):
+        """True when the predicates hold for a name -> bool assignment"""
+        return all(values[name] == expected for name, expected in self.predicates)
+
+    def __repr__(self):
+        conditions = [f"{'' if expected else '!'}{name}" for name, expected in self.predicates]
+        return f"{self.gesture.name}[{' '.join([self.fingers] + conditions)}]"
+
+# The gesture table, in priority order (the first matching rule wins). Every
+# rule must be reachable (building the table raises otherwise) and rules of
+# different gestures should not overlap (printed when the table is built)
+GESTURE_RULES = [
+    # Clicks first: thumb touching a raised fingertip
+    GestureRule(HandGesture.LEFT_CLICK, '11000', 'thumb_index_touch'),
+    GestureRule(HandGesture.RIGHT_CLICK, '1*1**', 'thumb_middle_touch'),
+    GestureRule(HandGesture.RIGHT_CLICK, '*01**', 'thumb_middle_touch'),  # Thumb folded onto the middle finger
+    # Cursor: index finger only, or index + thumb when they are not touching
+    GestureRule(HandGesture.CURSOR_CONTROL, '01000'),
+    GestureRule(HandGesture.CURSOR_CONTROL, '11000', '!thumb_index_touch'),
+    # Thumb only: scroll in the direction it points
+    GestureRule(HandGesture.SCROLL_UP, '10000', 'thumb_up'),
+    GestureRule(HandGesture.SCROLL_DOWN, '10000', '!thumb_up'),
+    GestureRule(HandGesture.VOLUME_UP, '01100', '!thumb_middle_touch'),  # Peace sign
+    GestureRule(HandGesture.VOLUME_DOWN, '00000'),  # Closed fist
+    GestureRule(HandGesture.PLAY_PAUSE, '01111'),
+    GestureRule(HandGesture.NEXT_TRACK, '11111', '!thumb_middle_touch'),  # Touching is a right click
+    GestureRule(HandGesture.PREV_TRACK, '00001'),
+    # Thumb and pinky out ("shaka"): brightness in the direction the thumb points
+    GestureRule(HandGesture.BRIGHTNESS_UP, '10001', 'thumb_up'),
+    GestureRule(HandGesture.BRIGHTNESS_DOWN, '10001', '!thumb_up'),
+]
+
+class GestureTable:
+    """GESTURE_RULES compiled into a 32-entry lookup by finger mask
+
+    Each entry holds the few (predicates, gesture) candidates left for that
+    finger combination, in priority order, so classification is one index
+    plus at most a couple of predicate checks.
+
+    A rule is dropped from a finger combination when every predicate
+    assignment it accepts is already taken by the earlier rules together;
+    a rule dropped everywhere can never fire and raises ValueError. Rules
+    of different gestures that compete for the same hands (overlaps,
+    resolved by order) are printed and kept in self.warnings.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.entries = [[] for _ in range(32)]
+        self.warnings = []
+        
+        names = sorted({name for rule in rules for name, _ in rule.predicates})
+        assignments = [dict(zip(names, values)) for values in itertools.product((False, True), repeat=len(names))]
+        reachable = {id(rule): False for rule in rules}
+        shadowed_by = {}  # id(rule) -> earlier rules that take its hands
+        overlaps = {}  # (earlier, later) -> finger patterns where both can match
+        for mask in range(32):
+            candidates = []
+            for rule in rules:
+                if mask not in rule.masks:
+                    continue
+                accepted = [values for values in assignments if rule.matches(values)]
+                if all(any(earlier.matches(values) for earlier in candidates) for values in accepted):
+                    shadows = shadowed_by.setdefault(id(rule), [])
+                    shadows.extend(earlier for earlier in candidates if earlier not in shadows
+                                   and any(earlier.matches(values) for values in accepted))
+                    continue
+                for earlier in candidates:
+                    if earlier.gesture != rule.gesture and not earlier.conflicts_with(rule):
+                        overlaps.setdefault((earlier, rule), []).append(self.mask_pattern(mask))
+                candidates.append(rule)
+                reachable[id(rule)] = True
+            self.entries[mask] = [(rule.predicates, rule.gesture) for rule in candidates]
+        
+        unreachable = [f"{rule} (shadowed by {', '.join(map(repr, shadowed_by[id(rule)]))})"
+                       for rule in rules if not reachable[id(rule)]]
+        if unreachable:
+            raise ValueError(f"Unreachable gesture rules: {'; '.join(unreachable)}")
+        for (earlier, rule), patterns in overlaps.items():
+            self.warnings.append(f"{earlier} takes precedence over {rule} for fingers {', '.join(patterns)}")
+            print(f"Gesture table: {self.warnings[-1]}")
+
+    @staticmethod
+    def mask_pattern(mask):
+        """Finger mask as a thumb-first '0'/'1' pattern"""
+        return ''.join(str((mask >> bit) & 1) for bit in range(5))
+
+    def classify(self, features):
+        """Gesture for one hand's HandFeatures"""
+        for predicates, gesture in self.entries[features.finger_mask]:
+            if all(bool(GESTURE_PREDICATES[name](features)) == expected for name, expected in predicates):
+                return gesture
+        return HandGesture.NONE
+
+GESTURE_TABLE = GestureTable(GESTURE_RULES)
+
+def recognize_gestures_batch(landmarks, click_threshold=0.06, return_codes=False):
+    """Classify a whole sequence of hands at once
+
+    Vectorized counterpart of HandMouseController.recognize_gesture for
+    offline re-labelling: landmarks is an (N, 21, 3) array and the result is
+    an (N,) array of HandGesture members (or integer codes into HandGesture
+    when return_codes is True). Both paths use GESTURE_TABLE, so they
+    always agree.
+    """
+    points = np.asarray(landmarks, dtype=np.float32)
+    x = points[:, :, 0]
+    y = points[:, :, 1]
+    
+    # Finger masks (N,), bit i set when finger i is up
+    thumb = np.where(x[:, 4] > x[:, 17], x[:, 4] > x[:, 3], x[:, 4] < x[:, 3])
+    others = y[:, FINGERTIP_IDS[1:]] < y[:, FINGER_PIP_IDS]
+    masks = np.column_stack([thumb, others]) @ FINGER_BITS
+    
+    # Predicate values (N,)
+    predicates = {
+        'thumb_index_touch': np.hypot(*(points[:, 4, :2] - points[:, 8, :2]).T) < click_threshold,
+        'thumb_middle_touch': np.hypot(*(points[:, 4, :2] - points[:, 12, :2]).T) < click_threshold,
+        'thumb_up': y[:, 4] < y[:, 2],
+    }
+    
+    codes = np.full(len(points), GESTURE_CODES[HandGesture.NONE], dtype=np.int64)
+    for mask in np.unique(masks):
+        rows = np.flatnonzero(masks == mask)
+        for rule_predicates, gesture in reversed(GESTURE_TABLE.entries[mask]):
+            # Evaluated lowest priority first so higher-priority rules overwrite
+            matched = np.ones(len(rows), dtype=bool)
+            for name, expected in rule_predicates:
+                matched &= predicates[name][rows] == expected
+            codes[rows[matched]] = GESTURE_CODES[gesture]
+    if return_codes:
+        return codes
+    return GESTURES_BY_CODE[codes]
+
+# Gestures that also steer the cursor
+CURSOR_GESTURES = (HandGesture.CURSOR_CONTROL, HandGesture.LEFT_CLICK, HandGesture.RIGHT_CLICK)
+
+class GestureTiming:
+    """Debounce and repeat timing of one gesture's action (given in milliseconds)
+
+    enter: the gesture must be held this long before its action fires
+    exit: another gesture must be held this long before this one is released
+    cooldown: minimum time between two activations of this gesture
+    repeat: continuous actions fire again at this interval while held;
+            None makes the action one-shot (fires once per activation)
+    """
+    __slots__ = ('enter', 'exit', 'cooldown', 'repeat')
+
+    def __init__(self, enter_ms, exit_ms, cooldown_ms=0, repeat_ms=None):
+        self.enter = enter_ms / 1000.0
+        self.exit = exit_ms / 1000.0
+        self.cooldown = cooldown_ms / 1000.0
+        self.repeat = repeat_ms / 1000.0 if repeat_ms is not None else None
+
+# Gestures with an action; anything else (cursor control, none) only releases the active gesture
+GESTURE_TIMINGS = {
+    HandGesture.LEFT_CLICK: GestureTiming(40, 80, cooldown_ms=250),
+    HandGesture.RIGHT_CLICK: GestureTiming(60, 80, cooldown_ms=400),
+    HandGesture.SCROLL_UP: GestureTiming(80, 100, repeat_ms=100),
+    HandGesture.SCROLL_DOWN: GestureTiming(80, 100, repeat_ms=100),
+    HandGesture.VOLUME_UP: GestureTiming(150, 150, repeat_ms=300),
+    HandGesture.VOLUME_DOWN: GestureTiming(200, 150, repeat_ms=300),
+    HandGesture.BRIGHTNESS_UP: GestureTiming(150, 150, repeat_ms=300),
+    HandGesture.BRIGHTNESS_DOWN: GestureTiming(150, 150, repeat_ms=300),
+    HandGesture.PLAY_PAUSE: GestureTiming(200, 150, cooldown_ms=1000),
+    HandGesture.NEXT_TRACK: GestureTiming(200, 150, cooldown_ms=1000),
+    HandGesture.PREV_TRACK: GestureTiming(200, 150, cooldown_ms=1000),
+}
+
+class GestureStateMachine:
+    """Decides when recognized gestures fire their actions
+
+    Fed with the gesture of every inferred frame (HandGesture.NONE when no
+    hand is visible). A gesture becomes active once it has been seen
+    continuously for its enter time and its cooldown has passed; one-shot
+    actions fire on that edge only, continuous ones also at their repeat
+    interval while the gesture is held. The active gesture is released only
+    after a different gesture has been held for its exit time, so brief
+    misclassifications neither re-trigger clicks nor interrupt scrolling.
+    """
+
+    def __init__(self, timings=None):
+        self.timings = timings if timings is not None else GESTURE_TIMINGS
+        self.reset()
+
+    def reset(self):
+        self.candidate = HandGesture.NONE  # Gesture seen on the latest frames
+        self.candidate_since = 0.0
+        self.active = None                 # Gesture whose action is engaged
+        self.last_fire = 0.0               # Time the active gesture last fired
+        self.last_activation = {}          # gesture -> time it last became active
+
+    def update(self, gesture, now):
+        """Advance to time now; returns the gesture whose action fires, or None"""
+        if gesture != self.candidate:
+            self.candidate = gesture
+            self.candidate_since = now
+        held = now - self.candidate_since
+        
+        if self.active is not None:
+            timing = self.timings[self.active]
+            if gesture == self.active:
+                if timing.repeat is not None and now - self.last_fire >= timing.repeat:
+                    # Keep the average rate at 1/repeat despite the frame granularity
+                    self.last_fire = max(self.last_fire + timing.repeat, now - timing.repeat)
+                    return gesture
+                return None
+            if held < timing.exit:
+                return None
+            self.active = None
+        
+        timing = self.timings.get(gesture)
+        if timing is None or held < timing.enter:
+            return None
+        if now - self.last_activation.get(gesture, -math.inf) < timing.cooldown:
+            return None
+        self.active = gesture
+        self.last_fire = now
+        self.last_activation[gesture] = now
+        return gesture
+
+# Continuous hand parameters for analog control; larger means "more"
+ANALOG_PARAMETERS = {
+    # Wrist height in normalized frame units (raising the hand increases it)
+    'wrist_height': lambda features: -features.coords[0][1],
+    # Thumb to index tip distance relative to the palm length (wrist to middle MCP)
+    'pinch': lambda features: features.tip_distance(0, 1) / max(
+        math.hypot(features.coords[9][0] - features.coords[0][0], features.coords[9][1] - features.coords[0][1]),
+        1e-6),
+    # Hand roll in radians (index MCP to pinky MCP direction)
+    'roll': lambda features: -math.atan2(features.coords[17][1] - features.coords[5][1],
+                                         features.coords[17][0] - features.coords[5][0]),
+}
+
+class AnalogControl:
+    """Turns a continuous hand parameter into merged, rate-limited output steps
+
+    While engaged, the parameter's change since engage() (minus a dead
+    zone) either sets a scroll-like velocity (mode "rate": gain steps per
+    second per unit of change) or a level offset (mode "level": gain steps
+    per unit of change). update() returns the whole steps not emitted yet,
+    at most once per min_interval, so a large adjustment becomes a few
+    events carrying many steps instead of a stream of single steps.
+    """
+    RATE = "rate"
+    LEVEL = "level"
+
+    def __init__(self, mode, gain, deadzone=0.02, min_interval=0.05):
+        self.mode = mode
+        self.gain = gain
+        self.deadzone = deadzone
+        self.min_interval = min_interval
+        self.engaged = False
+        self.reference = 0.0
+        self.target = 0.0     # Steps requested since engage() (fractional)
+        self.emitted = 0      # Steps already emitted since engage()
+        self.last_time = 0.0
+        self.last_emit = -math.inf
+
+    def engage(self, value, now):
+        """Start a new adjustment relative to the current parameter value"""
+        self.engaged = True
+        self.reference = value
+        self.target = 0.0
+        self.emitted = 0
+        self.last_time = now
+
+    def update(self, value, now):
+        """Advance with a new parameter value; returns the signed steps to emit now"""
+        delta = value - self.reference
+        delta = math.copysign(max(abs(delta) - self.deadzone, 0.0), delta)
+        if self.mode == self.RATE:
+            self.target += self.gain * delta * (now - self.last_time)
+        else:
+            self.target = self.gain * delta
+        self.last_time = now
+        
+        if now - self.last_emit < self.min_interval:
+            return 0
+        return self._take(now)
+
+    def release(self, now):
+        """Stop adjusting; returns any steps still owed"""
+        self.engaged = False
+        return self._take(now)
+
+    def _take(self, now):
+        pending = int(self.target) - self.emitted
+        if pending:
+            self.emitted += pending
+            self.last_emit = now
+        return pending
+
+# Gestures that engage an analog control, by control name
+ANALOG_GESTURES = {
+    HandGesture.SCROLL_UP: 'scroll', HandGesture.SCROLL_DOWN: 'scroll',
+    HandGesture.VOLUME_UP: 'volume', HandGesture.VOLUME_DOWN: 'volume',
+    HandGesture.BRIGHTNESS_UP: 'brightness', HandGesture.BRIGHTNESS_DOWN: 'brightness',
+}
+
+def make_analog_controls():
+    """The analog controls of one hand"""
+    return {
+        'scroll': AnalogControl(AnalogControl.RATE, gain=300.0),  # Units/s per unit of change
+        'volume': AnalogControl(AnalogControl.LEVEL, gain=150.0, deadzone=0.01),  # Key steps per unit
+        'brightness': AnalogControl(AnalogControl.LEVEL, gain=150.0, deadzone=0.01),
+    }
+
+# What a tracked hand controls:
+# - cursor: moves the cursor and performs every gesture
+# - gestures: performs gestures but never moves the cursor
+# - modifier: holds a modifier key while showing a MODIFIER_KEYS gesture
+# - ignore: tracked but has no effect
+HAND_ROLES = ('cursor', 'gestures', 'modifier', 'ignore')
+
+# Modifier-hand gestures and the key they hold down
+MODIFIER_KEYS = {
+    HandGesture.VOLUME_DOWN: 'ctrl',      # Closed fist
+    HandGesture.CURSOR_CONTROL: 'shift',  # Index finger up
+    HandGesture.VOLUME_UP: 'alt',         # Peace sign
+}
+MODIFIER_TIMINGS = {gesture: GestureTiming(100, 100) for gesture in MODIFIER_KEYS}
+
+# Landmarks averaged into the palm position used for association
+PALM_LANDMARK_IDS = [0, 5, 9, 13, 17]
+
+class HandTrack:
+    """State kept across frames for one tracked hand
+
+    Each hand smooths its own cursor path and runs its own gesture state
+    machine and analog controls, so two hands never disturb each other.
+    """
+    __slots__ = ('track_id', 'handedness', 'role', 'position', 'misses', 'cursor_filter',
+                 'gesture_machine', 'analog_controls', 'active_control', 'held_key')
+
+    def __init__(self, track_id, handedness, role, cursor_filter):
+        self.track_id = track_id
+        self.handedness = handedness  # "Left", "Right" or None when unknown
+        self.role = role
+        self.position = None          # Palm centre (x, y), normalized
+        self.misses = 0               # Consecutive frames without a matching hand
+        self.cursor_filter = cursor_filter
+        self.gesture_machine = GestureStateMachine(MODIFIER_TIMINGS if role == 'modifier' else GESTURE_TIMINGS)
+        self.analog_controls = make_analog_controls()
+        self.active_control = None    # Name of the engaged analog control
+        self.held_key = None          # Modifier key held down by this hand
+
+class HandAssociator:
+    """Gives detected hands stable track ids from frame to frame
+
+    Detections are matched to live tracks greedily by palm distance, with
+    a penalty when MediaPipe's handedness label disagrees. Unmatched
+    detections start new tracks (built by create_track(track_id,
+    handedness)); tracks unmatched for more than max_misses inferred
+    frames are dropped.
+    """
+
+    def __init__(self, create_track, max_distance=0.25, handedness_penalty=0.5, max_misses=5):
+        self.create_track = create_track
+        self.max_distance = max_distance
+        self.handedness_penalty = handedness_penalty
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 1
+
+    def update(self, handedness, features):
+        """Match one frame's hands; returns (tracks per hand, lost tracks, removed tracks)
+
+        lost tracks are still alive but were not seen this frame; removed
+        tracks were dropped and should release whatever they hold.
+        """
+        positions = [(sum(features_item.coords[index][0] for index in PALM_LANDMARK_IDS) / len(PALM_LANDMARK_IDS),
+                      sum(features_item.coords[index][1] for index in PALM_LANDMARK_IDS) / len(PALM_LANDMARK_IDS))
+                     for features_item in features]
+        
+        pairs = []
+        for detection, position in enumerate(positions):
+            for track in self.tracks:
+                distance = math.hypot(position[0] - track.position[0], position[1] - track.position[1])
+                if handedness[detection] and track.handedness and handedness[detection] != track.handedness:
+                    distance += self.handedness_penalty
+                if distance <= self.max_distance:
+                    pairs.append((distance, detection, track))
+        pairs.sort(key=lambda pair: pair[0])
+        
+        matched = [None] * len(positions)
+        used = set()
+        for _, detection, track in pairs:
+            if matched[detection] is None and id(track) not in used:
+                matched[detection] = track
+                used.add(id(track))
+        
+        lost = []
+        removed = []
+        for track in self.tracks:
+            if id(track) not in used:
+                track.misses += 1
+                (removed if track.misses > self.max_misses else lost).append(track)
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+        
+        for detection, position in enumerate(positions):
+            track = matched[detection]
+            if track is None:
+                track = self.create_track(self.next_id, handedness[detection])
+                self.next_id += 1
+                self.tracks.append(track)
+            track.position = position
+            track.misses = 0
+            matched[detection] = track
+        return matched, lost, removed
+
+class ActuationQueue:
+    """Runs input injection on a dedicated worker thread
+
+    The vision loop submits calls and returns immediately, so it never
+    sleeps in input injection (e.g. pyautogui.PAUSE). Consecutive
+    coalescible calls (cursor moves) are merged so only the newest target
+    is executed; everything else runs in submission order. Until start()
+    is called, submissions execute inline.
+
+    Only cursor moves are ever dropped. When the queue is full a move is
+    discarded, while any other call (clicks, key presses and the matching
+    releases) evicts the oldest queued move or, if there is none, waits
+    for the worker to make room. Drops are counted and logged.
+    """
+
+    def __init__(self, maxsize=256, profiler=None, tag_target=None):
+        self.maxsize = maxsize
+        self.profiler = profiler  # Optional StageProfiler for queue/injection latency
+        self.tag_target = tag_target  # Optional object whose .tag is set before each call runs
+        self.tag = None  # Tag attached to submissions (the id of the frame being actuated)
+        self.items = deque()  # (function, args, coalesce, submit_time, tag)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        
+        # Statistics
+        self.executed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.drop_log_interval = 1.0  # Seconds between "dropped" messages
+        self.last_drop_log = -math.inf
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def start(self):
+        """Start the worker thread"""
+        self.running = True
+        self.thread = threading.Thread(target=self._worker_loop, name="Actuation", daemon=True)
+        self.thread.start()
+        return self
+
+    def submit(self, function, *args, coalesce=False):
+        """Queue function(*args); coalesce=True replaces a queued call to the same function"""
+        now = time.perf_counter()
+        if not self.running:
+            self._execute(function, args, now, self.tag)
+            return
+        
+        with self.condition:
+            if coalesce and self.items and self.items[-1][2] and self.items[-1][0] == function:
+                self.items[-1] = (function, args, True, now, self.tag)
+                self.coalesced += 1
+                return
+            if len(self.items) >= self.maxsize:
+                if coalesce:
+                    self._log_drop(now)
+                    return
+                evicted = next((index for index, item in enumerate(self.items) if item[2]), None)
+                if evicted is not None:
+                    del self.items[evicted]
+                    self._log_drop(now)
+                while len(self.items) >= self.maxsize and self.running:
+                    self.condition.wait()
+            if self.running:
+                self.items.append((function, args, coalesce, now, self.tag))
+                self.condition.notify_all()
+                return
+        # Stopped while waiting for room: run it here rather than lose it
+        self._execute(function, args, now, self.tag)
+
+    def _log_drop(self, now):
+        """Count one dropped cursor move, printing at most every drop_log_interval"""
+        self.dropped += 1
+        if now - self.last_drop_log >= self.drop_log_interval:
+            self.last_drop_log = now
+            print(f"Input queue full ({self.maxsize} calls): dropped cursor move ({self.dropped} so far)")
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                while not self.items and self.running:
+                    self.condition.wait()
+                if not self.items:
+                    return
+                function, args, _, submit_time, tag = self.items.popleft()
+                self.condition.notify_all()  # Wake a submitter waiting for room
+            self._execute(function, args, submit_time, tag)
+
+    def _execute(self, function, args, submit_time, tag=None):
+        start = time.perf_counter()
+        latency = start - submit_time
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        if self.tag_target is not None:
+            self.tag_target.tag = tag
+        try:
+            function(*args)
+        except Exception as e:
+            print(f"Error executing input action: {e}")
+        self.executed += 1
+        if self.profiler is not None:
+            self.profiler.record('input_queue', latency)
+            self.profiler.record('injection', time.perf_counter() - start)
+
+    def stop(self):
+        """Finish the queued calls and stop the worker"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def depth(self):
+        """Number of queued calls"""
+        return len(self.items)
+
+    def average_latency(self):
+        """Mean seconds between submission and execution"""
+        return self.latency_total / self.executed if self.executed else 0.0
+
+class Sprite:
+    """Pre-rendered overlay element: BGR patch, optional mask and top-left position"""
+    __slots__ = ('patch', 'mask', 'x', 'y')
+
+    def __init__(self, patch, mask, x, y):
+        self.patch = patch  # (h, w, 3) uint8
+        self.mask = mask    # (h, w, 1) bool, or None for a solid block
+        self.x = x
+        self.y = y
+
+    def blit(self, frame):
+        """Copy the sprite into frame, clipped to the frame borders"""
+        height, width = self.patch.shape[:2]
+        x0, y0 = max(self.x, 0), max(self.y, 0)
+        x1 = min(self.x + width, frame.shape[1])
+        y1 = min(self.y + height, frame.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        
+        region = frame[y0:y1, x0:x1]
+        patch = self.patch[y0 - self.y:y1 - self.y, x0 - self.x:x1 - self.x]
+        if self.mask is None:
+            region[...] = patch
+        else:
+            np.copyto(region, patch, where=self.mask[y0 - self.y:y1 - self.y, x0 - self.x:x1 - self.x])
+
+class OverlayRenderer:
+    """Draws the preview overlay from cached sprites
+
+    Static elements (calibration zone, headers) are rendered once per frame
+    size. Every distinct text string is rasterized once and reused, so
+    dynamic text only costs a rasterization when its value changes. The set
+    of dynamic sprites is rebuilt at refresh_rate Hz, independent of the
+    tracking rate; every displayed frame just blits the cached sprites and
+    draws the hand skeleton.
+    """
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    FINGER_NAMES = ['Thumb', 'Index', 'Middle', 'Ring', 'Pinky']
+
+    def __init__(self, mp_draw, connections, refresh_rate=15.0):
+        self.mp_draw = mp_draw
+        self.connections = connections
+        self.refresh_interval = 1.0 / refresh_rate
+        self.landmark_spec = mp_draw.DrawingSpec(color=(0, 255, 0), thickness=2)
+        self.connection_spec = mp_draw.DrawingSpec(color=(255, 0, 0), thickness=2)
+        
+        self.text_cache = {}        # (text, scale, color, thickness) -> (patch, mask, dx, dy)
+        self.static_sprites = []
+        self.static_key = None      # (width, height, calibration zone) the static layer was built for
+        self.dynamic_sprites = []
+        self.last_refresh = 0.0
+
+    def text(self, text, origin, scale, color, thickness):
+        """Sprite for cv2.putText(text, origin, ...) using the text cache"""
+        key = (text, scale, color, thickness)
+        entry = self.text_cache.get(key)
+        if entry is None:
+            (text_width, text_height), baseline = cv2.getTextSize(text, self.FONT, scale, thickness)
+            pad = thickness + 1
+            shape = (text_height + baseline + 2 * pad, text_width + 2 * pad)
+            patch = np.zeros(shape + (3,), dtype=np.uint8)
+            mask = np.zeros(shape, dtype=np.uint8)
+            cv2.putText(patch, text, (pad, text_height + pad), self.FONT, scale, color, thickness)
+            cv2.putText(mask, text, (pad, text_height + pad), self.FONT, scale, 255, thickness)
+            entry = (patch, mask[..., None] > 0, -pad, -(text_height + pad))
+            if len(self.text_cache) > 512:
+                self.text_cache.clear()
+            self.text_cache[key] = entry
+        patch, mask, dx, dy = entry
+        return Sprite(patch, mask, origin[0] + dx, origin[1] + dy)
+
+    def build_static(self, width, height, calibration_zone):
+        """Calibration zone outline and fixed labels"""
+        x1 = int(calibration_zone['x_min'] * width)
+        y1 = int(calibration_zone['y_min'] * height)
+        x2 = int(calibration_zone['x_max'] * width)
+        y2 = int(calibration_zone['y_max'] * height)
+        
+        # Outline drawn once with cv2.rectangle (thickness 2 paints 3 px lines
+        # with rounded corners) and cut into four edge sprites, so blitting
+        # only touches the outline and not the whole zone
+        thickness = 2
+        pad = thickness
+        canvas = np.zeros((y2 - y1 + 1 + 2 * pad, x2 - x1 + 1 + 2 * pad, 3), dtype=np.uint8)
+        cv2.rectangle(canvas, (pad, pad), (pad + x2 - x1, pad + y2 - y1), (255, 255, 0), thickness)
+        mask = canvas.any(axis=2)[:, :, None]
+        band = 2 * pad + 1  # Rows/columns an edge can cover
+        canvas_height, canvas_width = canvas.shape[:2]
+        edges = [(0, band, 0, canvas_width), (canvas_height - band, canvas_height, 0, canvas_width),
+                 (band, canvas_height - band, 0, band),
+                 (band, canvas_height - band, canvas_width - band, canvas_width)]
+        sprites = [Sprite(canvas[top:bottom, left:right], mask[top:bottom, left:right],
+                          x1 - pad + left, y1 - pad + top)
+                   for top, bottom, left, right in edges]
+        
+        sprites.append(self.text("Finger States:", (width - 200, 130), 0.6, (255, 255, 255), 2))
+        return sprites
+
+    def build_dynamic(self, controller, packet, width, height):
+        """Sprites for the values that change (gesture, FPS, finger states...)"""
+        sprites = []
+        if not packet.hands:
+            sprites.append(self.text("No hand detected - Show your hand to the camera",
+                                     (10, height - 20), 0.7, (0, 0, 255), 2))
+            return sprites
+        
+        _, features, gesture = packet.hands[0]
+        if controller.clock() - controller.gesture_display_start < controller.gesture_display_time:
+            sprites.append(self.text(f"Action: {controller.last_gesture_display}", (10, 30), 1, (0, 255, 0), 2))
+        sprites.append(self.text(f"Gesture: {gesture.value}", (10, 70), 0.7, (255, 255, 255), 2))
+        sprites.append(self.text(f"FPS: {controller.current_fps:.1f}", (10, 110), 0.7, (255, 255, 255), 2))
+        if controller.predictive_cursor:
+            sprites.append(self.text(f"Latency: {1000 * controller.compensator.latency:.0f} ms "
+                                     f"(hidden {controller.compensator.hidden_latency_ms():.0f} ms)",
+                                     (10, 150), 0.6, (255, 255, 255), 2))
+        
+        if len(packet.tracks) > 1:
+            for i, ((_, _, hand_gesture), track) in enumerate(zip(packet.hands, packet.tracks)):
+                sprites.append(self.text(f"Hand {track.track_id} ({track.handedness or '?'}, {track.role}): "
+                                         f"{hand_gesture.value}", (10, 190 + i * 25), 0.6, (255, 255, 255), 1))
+        
+        for i, (name, state) in enumerate(zip(self.FINGER_NAMES, features.finger_states)):
+            color = (0, 255, 0) if state else (0, 0, 255)
+            status = 'UP' if state else 'DOWN'
+            sprites.append(self.text(f"{name}: {status}", (width - 200, 150 + i * 25), 0.5, color, 1))
+        sprites.append(self.text(f"Total Up: {features.fingers_up}", (width - 200, 150 + 5 * 25 + 10),
+                                 0.6, (255, 255, 0), 2))
+        return sprites
+
+    def draw(self, frame, controller, packet):
+        """Draw the overlay for one displayed frame"""
+        height, width = frame.shape[:2]
+        static_key = (width, height, tuple(controller.calibration_zone.values()))
+        if static_key != self.static_key:
+            self.static_sprites = self.build_static(width, height, controller.calibration_zone)
+            self.static_key = static_key
+        
+        now = time.perf_counter()
+        if now - self.last_refresh >= self.refresh_interval:
+            self.dynamic_sprites = self.build_dynamic(controller, packet, width, height)
+            self.last_refresh = now
+        
+        for sprite in self.static_sprites:
+            sprite.blit(frame)
+        for sprite in self.dynamic_sprites:
+            sprite.blit(frame)
+        
+        # The skeleton has to match the image, so it is drawn on every frame
+        for hand_landmarks, _, _ in packet.hands:
+            self.mp_draw.draw_landmarks(frame, hand_landmarks, self.connections,
+                                        self.landmark_spec, self.connection_spec)
+
 class HandMouseController:
     """Professional Hand Mouse Controller with advanced gesture recognition"""
     
-    def __init__(self):
-        # Initialize MediaPipe
-        self.mp_hands = mp.solutions.hands
-        self.mp_draw = mp.solutions.drawing_utils
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            min_detection_confidence=0.8,
-            min_tracking_confidence=0.8
-        )
+    def __init__(self, pipelined=True, roi_tracking=False, adaptive_inference=True,
+                 cursor_filter="one_euro", predictive_cursor=False, input_backend=None,
+                 headless=False, overlay_rate=15.0, preview_rate=30.0, profile=True,
+                 latency_report=None, capture=True, record_path=None, record_frames=False, source=None,
+                 gesture_model=None, analog=False, analog_parameter="wrist_height", max_hands=1,
+                 hand_roles=None, camera_probe="auto", latency_target=50.0, parallel_startup=True,
+                 target_fps=30.0, quality_governor=True, screen_size=None, tracker=None):
+        self.startup = StartupTimer()
+        
+        # Hand model (MediaPipe Hands, warmed up), cursor and key output (see
+        # input_backends.create_backend) and the frame source (camera, video
+        # file, image directory or synthetic, see frame_sources.create_source).
+        # With parallel_startup the model and the input backend load on worker
+        # threads while the source opens on this one. capture=False (offline
+        # use such as replaying sessions) needs neither a source nor the model,
+        # and a supplied tracker (RoiHandTracker's interface, e.g.
+        # frame_sources.SyntheticTracker) replaces the model, which is then
+        # never loaded.
+        # screen_size (width, height) is for backends that cannot query the
+        # screen (uinput); it is detected when None.
+        # Cameras use the fastest probed mode within latency_target ms unless
+        # camera_probe is "off"
+        self.hands = None
+        self.source = None
+        self.grabber = None
+        source_args = (source, 1280, 720, 30, camera_probe, latency_target)
+        load_model = capture and tracker is None
+        if parallel_startup and capture:
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="Startup") as pool:
+                if load_model:
+                    model = pool.submit(self.startup.measure, 'model', load_hand_model, max_hands)
+                backend = pool.submit(self.startup.measure, 'input', create_backend, input_backend,
+                                      pyautogui_pause=0.01, screen_size=screen_size)
+                self.source = self.startup.measure('source', create_source, *source_args)
+                if load_model:
+                    self.hands, warmup_time = model.result()
+                self.input = backend.result()
+        else:
+            self.input = self.startup.measure('input', create_backend, input_backend, pyautogui_pause=0.01,
+                                              screen_size=screen_size)
+            if capture:
+                self.source = self.startup.measure('source', create_source, *source_args)
+            if load_model:
+                self.hands, warmup_time = self.startup.measure('model', load_hand_model, max_hands)
+        if load_model:
+            self.startup.steps['warmup'] = warmup_time  # Part of the model step
+        if capture:
+            self.grabber = FrameGrabber(self.source)
         
         # Screen dimensions
-        self.screen_width, self.screen_height = pyautogui.size()
+        self.screen_width, self.screen_height = self.input.size()
+        
+        # Crop inference to the area around the last known hand
+        self.tracker = tracker if tracker is not None else RoiHandTracker(self.hands, enabled=roi_tracking)
+        
+        # Stable ids and per-hand state for every visible hand; roles map
+        # MediaPipe handedness ("Left"/"Right") to HAND_ROLES
+        self.max_hands = max_hands
+        self.hand_roles = hand_roles if hand_roles is not None else (
+            {'Right': 'cursor', 'Left': 'gestures'} if max_hands > 1 else {})
+        self.associator = HandAssociator(self.create_hand_track,
+                                         max_distance=0.25 if max_hands > 1 else math.inf)
+        self.last_tracks = []
+        self.last_handedness = []
+        
+        # Skip inference on some frames and predict the fingertip instead
+        self.scheduler = InferenceScheduler(frame_budget=1.0 / target_fps, enabled=adaptive_inference)
+        self.predictor = TipPredictor()
+        self.last_hands = []
+        
+        # Time source for gesture timing; replaced by SessionReplayer with a ReplayClock
+        self.clock = time.perf_counter
+        
+        # Optional session recording (landmarks, gestures and optionally frames)
+        self.recorder = SessionRecorder(record_path, record_frames, max_hands) if record_path else None
+        
+        # Pipelined runtime (capture -> inference -> actuation -> render)
+        self.pipelined = pipelined
+        self.headless = headless  # No overlay, no window; stopped by SIGINT/SIGTERM
+        self.stop_event = threading.Event()
+        self.stages = []
+        self.stage_queues = []
+        self.stats_interval = 5.0  # Seconds between pipeline stats printouts
+        self.last_stats_print = 0
         
-        # Camera setup
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        # Per-stage latency histograms (printed periodically and on exit)
+        self.profiler = StageProfiler(enabled=profile)
+        self.latency_report = latency_report  # Optional JSON path written on exit
         
-        # Performance settings
-        pyautogui.FAILSAFE = False
-        pyautogui.PAUSE = 0.01
+        # Input injection runs off the vision loop; a recording backend has
+        # each event tagged with the id of the frame that caused it
+        self.actuator = ActuationQueue(profiler=self.profiler,
+                                       tag_target=self.input if hasattr(self.input, 'tag') else None)
         
         # Cursor smoothing
-        self.cursor_history = deque(maxlen=5)
-        self.smoothing_factor = 0.7
+        self.cursor_filter = None
+        self.set_cursor_filter(cursor_filter)
+        
+        # Extrapolate the cursor to hide capture/inference/smoothing delay
+        self.predictive_cursor = predictive_cursor
+        self.compensator = LatencyCompensator()
+        
+        # Analog mode: moving the hand while scrolling/volume/brightness gestures
+        # are held drives the amount (see AnalogControl and ANALOG_PARAMETERS)
+        self.analog_mode = analog
+        self.analog_parameter = analog_parameter
         
         # Gesture control
-        self.last_gesture = HandGesture.NONE
-        self.gesture_delay = 0.5  # Increased delay between gesture switches
-        self.last_gesture_time = 0
-        self.click_threshold = 0.04  # Moved to class level
-        self.scroll_sensitivity = 5  # Increased scroll speed
+        # Hand state for callers that do not track hands (gesture debounce,
+        # cooldown and repeat live in each HandTrack's GestureStateMachine)
+        self.default_track = HandTrack(0, None, 'cursor', self.cursor_filter)
+        self.click_threshold = 0.06  # Thumb-to-fingertip distance that counts as a touch
+        self.close_threshold = 0.08
+        self.scroll_sensitivity = 2  # Scroll units per repeat (every 100 ms while held)
+        self.gesture_table = GESTURE_TABLE
+        
+        # Optional trained classifier used instead of the gesture table
+        # (see gesture_classifier.py)
+        self.gesture_classifier = None
+        if gesture_model:
+            self.gesture_classifier = load_classifier(gesture_model)
+            self.classifier_gestures = [HandGesture[name] for name in self.gesture_classifier.classes]
+            print(f"Gesture classifier: {self.gesture_classifier.kind} ({gesture_model})")
         
         # Drag and drop
         self.is_dragging = False
@@ -97,12 +2001,30 @@ class HandMouseController:
         self.fps_counter = 0
         self.fps_start_time = time.time()
         self.current_fps = 0
+        self.frames_processed = 0
+        self.run_start_time = 0
         
         # Visual feedback
         self.gesture_display_time = 1.0
         self.last_gesture_display = ""
         self.gesture_display_start = 0
         
+        # Overlay text refreshes at overlay_rate Hz (0 draws everything on every
+        # frame); the preview window updates at most preview_rate times a second.
+        # Headless runs never draw, so they skip it (and loading MediaPipe's drawing code)
+        self.overlay = None
+        if overlay_rate > 0 and not headless:
+            self.overlay = OverlayRenderer(self.mp_draw, self.mp_hands.HAND_CONNECTIONS, overlay_rate)
+        self.preview_interval = 1.0 / preview_rate if preview_rate > 0 else 0.0
+        self.last_preview_time = 0
+        self.preview_frame = None  # Mirrored copy of the frame shown in the preview window
+        self.overlay_rate = overlay_rate
+        
+        # Lowers inference resolution, overlay rate and inference frequency
+        # when frames take longer than the target_fps budget, and raises them
+        # again when there is headroom
+        self.governor = QualityGovernor(self.apply_quality, target_fps, enabled=quality_governor)
+        
         print("Hand Mouse Controller initialized successfully!")
         print("\n=== GESTURE CONTROLS ===")
         print("CURSOR CONTROL:")
@@ -121,152 +2043,106 @@ class HandMouseController:
         print("  - All five fingers up: Next track (fixed)")
         print("  - Only pinky up: Previous track")
         print("\nBRIGHTNESS:")
-        print("  - Thumbs up gesture: Brightness up")
-        print("  - Thumbs down gesture: Brightness down")
-        print("\nPress 'q' to quit, 'c' for calibration info")
+        print("  - Thumb + pinky out, thumb pointing up: Brightness up")
+        print("  - Thumb + pinky out, thumb pointing down: Brightness down")
+        print("\nPress 'q' to quit, 'c' for calibration info, 'f' to change cursor smoothing,")
+        print("'p' to toggle the predictive cursor")
         print("=" * 40)
+        self.startup.mark('ready')
+        print(self.startup.summary())
+
+    @property
+    def mp_hands(self):
+        """MediaPipe hands solution (imported on first use)"""
+        return mediapipe_solutions()[0]
+
+    @property
+    def mp_draw(self):
+        """MediaPipe drawing utilities (imported on first use)"""
+        return mediapipe_solutions()[1]
 
     def calculate_distance(self, point1, point2):
         """Calculate Euclidean distance between two points"""
-        return math.sqrt((point1.x - point2.x)**2 + (point1.y - point2.y)**2)
+        return math.hypot(point1.x - point2.x, point1.y - point2.y)
 
     def is_finger_up(self, landmarks, finger_tip, finger_pip):
         """Check if a finger is raised"""
         return landmarks[finger_tip].y < landmarks[finger_pip].y
 
+    def get_hand_features(self, landmarks):
+        """Compute the per-frame HandFeatures for one hand"""
+        return HandFeatures(landmarks, self.click_threshold, self.close_threshold)
+
     def get_finger_states(self, landmarks):
         """Get the state of all fingers (up/down)"""
-        finger_states = []
-        
-        # Thumb (special case - check x-coordinate relative to hand orientation)
-        # Compare thumb tip with thumb IP joint
-        thumb_is_up = landmarks[4].x > landmarks[3].x if landmarks[4].x > landmarks[17].x else landmarks[4].x < landmarks[3].x
-        finger_states.append(thumb_is_up)
-        
-        # Other fingers - compare tip with PIP joint
-        finger_tips = [8, 12, 16, 20]  # Index, Middle, Ring, Pinky
-        finger_pips = [6, 10, 14, 18]  # PIP joints
-        
-        for tip, pip in zip(finger_tips, finger_pips):
-            finger_states.append(landmarks[tip].y < landmarks[pip].y)
-        
-        return finger_states
-
-    def recognize_gesture(self, landmarks):
-        """Advanced gesture recognition with corrected finger detection"""
-        finger_states = self.get_finger_states(landmarks)
-        fingers_up_count = sum(finger_states)
-        
-        # Get key landmark positions for distance calculations
-        thumb_tip = landmarks[4]
-        index_tip = landmarks[8]
-        middle_tip = landmarks[12]
-        ring_tip = landmarks[16]
-        pinky_tip = landmarks[20]
-        
-        # Calculate distances for gesture detection
-        thumb_index_dist = self.calculate_distance(thumb_tip, index_tip)
-        thumb_middle_dist = self.calculate_distance(thumb_tip, middle_tip)
-        index_middle_dist = self.calculate_distance(index_tip, middle_tip)
-        
-        # Define distance thresholds
-        click_threshold = 0.06  # Increased threshold for better detection
-        close_threshold = 0.08
-        
-        # Debug for right click (uncomment to debug)
-        print(f"Thumb: {finger_states[0]}, Middle: {finger_states[2]}, Distance: {thumb_middle_dist:.3f}")
-        
-        # Gesture Recognition Logic - PRIORITIZE CLICKS FIRST
-        
-        # LEFT CLICK: Thumb + Index finger touch (both fingers up and close together)
-        if (finger_states[0] and finger_states[1] and  # Both thumb and index up
-            thumb_index_dist < click_threshold and      # They are close together
-            not finger_states[2] and not finger_states[3] and not finger_states[4]):  # Other fingers down
-            return HandGesture.LEFT_CLICK
-        
-        # RIGHT CLICK: Thumb + Middle finger touch - SIMPLIFIED DETECTION
-        elif (finger_states[0] and finger_states[2] and  # Both thumb and middle up
-              thumb_middle_dist < click_threshold):       # They are close together
-            # More flexible - don't require other fingers to be strictly down
-            return HandGesture.RIGHT_CLICK
-        
-        # ALTERNATIVE RIGHT CLICK: Just middle finger up with thumb touching
-        elif (finger_states[2] and  # Middle finger up
-              thumb_middle_dist < click_threshold and  # Thumb close to middle
-              not finger_states[1]):  # Index finger down (to avoid conflict with peace sign)
-            return HandGesture.RIGHT_CLICK
-        
-        # CURSOR CONTROL: Only index finger up (or index + thumb but not close)
-        elif (finger_states[1] and not finger_states[2] and not finger_states[3] and not finger_states[4] and
-              (not finger_states[0] or thumb_index_dist > click_threshold)):
-            return HandGesture.CURSOR_CONTROL
-        
-        # SCROLL UP: Thumb up only
-        elif finger_states[0] and not any(finger_states[1:]):
-            # Check if thumb is pointing up (y-coordinate check)
-            if thumb_tip.y < landmarks[2].y:  # Thumb tip above thumb CMC joint
-                return HandGesture.SCROLL_UP
-            else:
-                return HandGesture.SCROLL_DOWN
-        
-        # VOLUME UP: Peace sign (index + middle fingers up, others down) - but not too close to avoid right click
-        elif (finger_states == [False, True, True, False, False] and 
-              thumb_middle_dist > click_threshold):  # Ensure it's not a right click
-            return HandGesture.VOLUME_UP
-        
-        # VOLUME DOWN: Closed fist (no fingers up)
-        elif fingers_up_count == 0:
-            return HandGesture.VOLUME_DOWN
-        
-        # PLAY/PAUSE: Four fingers up (index, middle, ring, pinky - thumb down)
-        elif finger_states == [False, True, True, True, True]:
-            return HandGesture.PLAY_PAUSE
-        
-        # NEXT TRACK: All five fingers up (improved detection)
-        elif finger_states == [True, True, True, True, True]:
-            return HandGesture.NEXT_TRACK
-        
-        # PREVIOUS TRACK: Only pinky up
-        elif finger_states == [False, False, False, False, True]:
-            return HandGesture.PREV_TRACK
-        
-        # BRIGHTNESS UP: Thumbs up (thumb up, others down) - alternative interpretation
-        elif finger_states == [True, False, False, False, False] and thumb_tip.y < landmarks[2].y:
-            return HandGesture.BRIGHTNESS_UP
-        
-        # BRIGHTNESS DOWN: Thumbs down (thumb up but pointing down)
-        elif finger_states == [True, False, False, False, False] and thumb_tip.y > landmarks[2].y:
-            return HandGesture.BRIGHTNESS_DOWN
-        
-        return HandGesture.NONE
+        return finger_states_of(landmarks_to_array(landmarks).tolist())
+
+    def recognize_gesture(self, landmarks, features=None):
+        """Classify one hand with the trained classifier or the gesture table (see GESTURE_RULES)"""
+        if features is None:
+            features = self.get_hand_features(landmarks)
+        if self.gesture_classifier is not None:
+            return self.recognize_gestures([features])[0]
+        return self.gesture_table.classify(features)
+
+    def recognize_gestures(self, hand_features):
+        """Classify all hands of a frame from their HandFeatures
+
+        The trained classifier gets every hand in one predict() call; its cost
+        is mostly per call, so a second hand is almost free.
+        """
+        if not hand_features:
+            return []
+        if self.gesture_classifier is not None:
+            labels = self.gesture_classifier.predict(np.stack([features.points for features in hand_features]))
+            return [self.classifier_gestures[label] for label in labels]
+        return [self.gesture_table.classify(features) for features in hand_features]
 
-    def smooth_cursor_movement(self, x, y):
+    def apply_quality(self, level):
+        """Apply a QualityLevel chosen by the governor"""
+        self.tracker.inference_scale = level.inference_scale
+        self.tracker.set_input_size(level.roi_size)
+        self.scheduler.max_interval = level.max_interval
+        if self.overlay is not None:
+            self.overlay.refresh_interval = 1.0 / min(level.overlay_rate, self.overlay_rate)
+
+    def set_cursor_filter(self, name):
+        """Switch the cursor smoothing filter (see CURSOR_FILTERS)"""
+        self.cursor_filter = CURSOR_FILTERS[name]()
+        for track in self.associator.tracks:
+            track.cursor_filter = CURSOR_FILTERS[name]()
+        if hasattr(self, 'default_track'):
+            self.default_track.cursor_filter = self.cursor_filter
+        print(f"Cursor filter: {name}")
+
+    def cycle_cursor_filter(self):
+        """Select the next filter in CURSOR_FILTERS"""
+        names = list(CURSOR_FILTERS)
+        self.set_cursor_filter(names[(names.index(self.cursor_filter.name) + 1) % len(names)])
+
+    def smooth_cursor_movement(self, x, y, timestamp=None, cursor_filter=None):
         """Apply smoothing to cursor movement for stability"""
-        self.cursor_history.append((x, y))
-        
-        if len(self.cursor_history) < 2:
-            return x, y
-        
-        # Weighted average with recent positions having more influence
-        weights = np.linspace(0.1, 1.0, len(self.cursor_history))
-        weights /= weights.sum()
-        
-        smooth_x = sum(pos[0] * weight for pos, weight in zip(self.cursor_history, weights))
-        smooth_y = sum(pos[1] * weight for pos, weight in zip(self.cursor_history, weights))
-        
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        cursor_filter = cursor_filter or self.cursor_filter
+        smooth_x, smooth_y = cursor_filter.filter(x, y, timestamp)
         return int(smooth_x), int(smooth_y)
 
-    def control_cursor(self, landmarks, frame_shape):
+    def control_cursor(self, landmarks, frame_shape, timestamp=None, track=None):
         """Control cursor movement with improved accuracy"""
-        index_tip = landmarks[8]
-        
-        # Convert normalized coordinates to screen coordinates
-        frame_height, frame_width = frame_shape[:2]
-        
+        index_tip = landmarks_to_array(landmarks)[8]
+        self.move_cursor_normalized(float(index_tip[0]), float(index_tip[1]), timestamp, track)
+
+    def move_cursor_normalized(self, x, y, timestamp=None, track=None):
+        """Move the cursor to a fingertip position in normalized frame coordinates
+
+        timestamp is the capture time of the frame the position came from;
+        track selects the hand whose cursor filter smooths the path.
+        """
         # Apply calibration zone
-        x_normalized = (index_tip.x - self.calibration_zone['x_min']) / \
+        x_normalized = (x - self.calibration_zone['x_min']) / \
                       (self.calibration_zone['x_max'] - self.calibration_zone['x_min'])
-        y_normalized = (index_tip.y - self.calibration_zone['y_min']) / \
+        y_normalized = (y - self.calibration_zone['y_min']) / \
                       (self.calibration_zone['y_max'] - self.calibration_zone['y_min'])
         
         # Clamp values
@@ -278,72 +2154,152 @@ class HandMouseController:
         screen_y = int(y_normalized * self.screen_height)
         
         # Apply smoothing
-        smooth_x, smooth_y = self.smooth_cursor_movement(screen_x, screen_y)
+        smooth_x, smooth_y = self.smooth_cursor_movement(screen_x, screen_y, timestamp,
+                                                         track.cursor_filter if track is not None else None)
+        
+        # Lead the cursor by the measured pipeline latency
+        if self.predictive_cursor and timestamp is not None:
+            self.compensator.observe_latency(timestamp, self.clock())
+            smooth_x, smooth_y = self.compensator.predict(smooth_x, smooth_y, timestamp,
+                                                          self.screen_width, self.screen_height)
+            smooth_x, smooth_y = int(smooth_x), int(smooth_y)
         
         # Move cursor
-        pyautogui.moveTo(smooth_x, smooth_y)
+        self.actuator.submit(self.input.move_to, smooth_x, smooth_y, coalesce=True)
+        if self.startup.mark('first_cursor_move'):
+            print(f"First cursor move {1000 * self.startup.milestones['first_cursor_move']:.0f} ms after startup")
 
-    def execute_gesture(self, gesture):
-        """Execute system commands based on recognized gesture"""
-        current_time = time.time()
+    def execute_gesture(self, gesture, features=None, track=None):
+        """Feed the gesture of an inferred frame to a hand's state machine and run any action it fires
+
+        In analog mode the scroll, volume and brightness gestures engage an
+        AnalogControl driven by features instead of firing discrete steps.
+        track is the hand the gesture belongs to (default_track if None).
+        """
+        track = track or self.default_track
+        if track.role == 'ignore':
+            return
+        current_time = self.clock()
+        fired = track.gesture_machine.update(gesture, current_time)
+        
+        if track.role == 'modifier':
+            self.hold_modifier(track, MODIFIER_KEYS.get(track.gesture_machine.active))
+            return
         
-        # Prevent rapid gesture execution
-        if current_time - self.last_gesture_time < self.gesture_delay:
+        control_name = ANALOG_GESTURES.get(track.gesture_machine.active) if self.analog_mode else None
+        if track.active_control is not None and track.active_control != control_name:
+            self.emit_analog(track.active_control, track.analog_controls[track.active_control].release(current_time))
+            track.active_control = None
+        if control_name is not None:
+            if features is not None:
+                control = track.analog_controls[control_name]
+                value = ANALOG_PARAMETERS[self.analog_parameter](features)
+                if track.active_control is None:
+                    control.engage(value, current_time)
+                    track.active_control = control_name
+                elif ANALOG_GESTURES.get(gesture) == control_name:
+                    self.emit_analog(control_name, control.update(value, current_time))
             return
         
+        if fired is not None:
+            self.perform_gesture(fired, current_time)
+
+    def hold_modifier(self, track, key):
+        """Make track hold key (None releases whatever it holds)"""
+        if key == track.held_key:
+            return
+        if track.held_key is not None:
+            self.actuator.submit(self.input.key_up, track.held_key)
+        if key is not None:
+            self.actuator.submit(self.input.key_down, key)
+        track.held_key = key
+
+    def release_hand(self, track):
+        """Release the analog control and modifier key of a hand that disappeared"""
+        if track.active_control is not None:
+            self.emit_analog(track.active_control, track.analog_controls[track.active_control].release(self.clock()))
+            track.active_control = None
+        self.hold_modifier(track, None)
+
+    def create_hand_track(self, track_id, handedness):
+        """HandTrack for a newly seen hand, with its role from hand_roles"""
+        role = self.hand_roles.get(handedness)
+        if role is None:
+            # Unknown handedness: the first hand drives the cursor
+            has_cursor = any(track.role == 'cursor' for track in self.associator.tracks)
+            role = 'gestures' if has_cursor else 'cursor'
+        return HandTrack(track_id, handedness, role, CURSOR_FILTERS[self.cursor_filter.name]())
+
+    @staticmethod
+    def cursor_hand(packet):
+        """Index into packet.hands of the hand that drives the cursor, or None"""
+        return next((index for index, track in enumerate(packet.tracks) if track.role == 'cursor'), None)
+
+    def emit_analog(self, control_name, steps):
+        """Inject the merged steps of one analog control update"""
+        if not steps:
+            return
+        if control_name == 'scroll':
+            self.actuator.submit(self.input.scroll, steps)
+        else:
+            key = f"{control_name}{'up' if steps > 0 else 'down'}"
+            self.actuator.submit(self.input.press, key, abs(steps))
+        self.last_gesture_display = f"{control_name.capitalize()} {steps:+d}"
+        self.gesture_display_start = self.clock()
+
+    def perform_gesture(self, gesture, current_time):
+        """Execute the system command bound to a gesture"""
         try:
             if gesture == HandGesture.LEFT_CLICK:
-                pyautogui.click()
+                self.actuator.submit(self.input.click)
                 self.last_gesture_display = "Left Click"
                 
             elif gesture == HandGesture.RIGHT_CLICK:
-                pyautogui.rightClick()
+                self.actuator.submit(self.input.right_click)
                 self.last_gesture_display = "Right Click"
                 
             elif gesture == HandGesture.SCROLL_UP:
-                pyautogui.scroll(self.scroll_sensitivity)
+                self.actuator.submit(self.input.scroll, self.scroll_sensitivity)
                 self.last_gesture_display = "Scroll Up"
                 
             elif gesture == HandGesture.SCROLL_DOWN:
-                pyautogui.scroll(-self.scroll_sensitivity)
+                self.actuator.submit(self.input.scroll, -self.scroll_sensitivity)
                 self.last_gesture_display = "Scroll Down"
                 
             elif gesture == HandGesture.VOLUME_UP:
-                pyautogui.press('volumeup')
+                self.actuator.submit(self.input.press, 'volumeup')
                 self.last_gesture_display = "Volume Up"
                 
             elif gesture == HandGesture.VOLUME_DOWN:
-                pyautogui.press('volumedown')
+                self.actuator.submit(self.input.press, 'volumedown')
                 self.last_gesture_display = "Volume Down"
                 
             elif gesture == HandGesture.BRIGHTNESS_UP:
-                pyautogui.press('brightnessup')
+                self.actuator.submit(self.input.press, 'brightnessup')
                 self.last_gesture_display = "Brightness Up"
                 
             elif gesture == HandGesture.BRIGHTNESS_DOWN:
-                pyautogui.press('brightnessdown')
+                self.actuator.submit(self.input.press, 'brightnessdown')
                 self.last_gesture_display = "Brightness Down"
                 
             elif gesture == HandGesture.PLAY_PAUSE:
-                pyautogui.press('playpause')
+                self.actuator.submit(self.input.press, 'playpause')
                 self.last_gesture_display = "Play/Pause"
                 
             elif gesture == HandGesture.NEXT_TRACK:
-                pyautogui.press('nexttrack')
+                self.actuator.submit(self.input.press, 'nexttrack')
                 self.last_gesture_display = "Next Track"
                 
             elif gesture == HandGesture.PREV_TRACK:
-                pyautogui.press('prevtrack')
+                self.actuator.submit(self.input.press, 'prevtrack')
                 self.last_gesture_display = "Previous Track"
             
-            if gesture != HandGesture.CURSOR_CONTROL:
-                self.last_gesture_time = current_time
-                self.gesture_display_start = current_time
+            self.gesture_display_start = current_time
                 
         except Exception as e:
             print(f"Error executing gesture: {e}")
 
-    def draw_landmarks_and_info(self, frame, landmarks, gesture):
+    def draw_landmarks_and_info(self, frame, landmarks, gesture, features=None):
         """Draw hand landmarks and system information on frame"""
         # Draw hand landmarks
         self.mp_draw.draw_landmarks(
@@ -361,7 +2317,7 @@ class HandMouseController:
         cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 255, 0), 2)
         
         # Draw gesture information
-        current_time = time.time()
+        current_time = self.clock()
         if current_time - self.gesture_display_start < self.gesture_display_time:
             cv2.putText(frame, f"Action: {self.last_gesture_display}", 
                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
@@ -374,8 +2330,16 @@ class HandMouseController:
         cv2.putText(frame, f"FPS: {self.current_fps:.1f}", 
                    (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
+        # Draw latency hidden by the predictive cursor
+        if self.predictive_cursor:
+            cv2.putText(frame, f"Latency: {1000 * self.compensator.latency:.0f} ms "
+                        f"(hidden {self.compensator.hidden_latency_ms():.0f} ms)",
+                        (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        
         # Draw finger states with more detail
-        finger_states = self.get_finger_states(landmarks.landmark)
+        if features is None:
+            features = self.get_hand_features(landmarks)
+        finger_states = features.finger_states
         finger_names = ['Thumb', 'Index', 'Middle', 'Ring', 'Pinky']
         y_offset = 150
         
@@ -389,72 +2353,261 @@ class HandMouseController:
                        (width - 200, y_offset + i * 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
         
         # Show total fingers up
-        total_up = sum(finger_states)
+        total_up = features.fingers_up
         cv2.putText(frame, f"Total Up: {total_up}", 
                    (width - 200, y_offset + 5 * 25 + 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
 
     def calculate_fps(self):
         """Calculate and update FPS counter"""
         self.fps_counter += 1
+        self.frames_processed += 1
         current_time = time.time()
         if current_time - self.fps_start_time >= 1.0:
             self.current_fps = self.fps_counter
             self.fps_counter = 0
             self.fps_start_time = current_time
 
+    def read_packet(self):
+        """Capture stage: wrap the newest camera frame in a FramePacket"""
+        start = time.perf_counter()
+        ret, frame = self.grabber.read(self.stop_event)
+        self.profiler.record('capture', time.perf_counter() - start)
+        if not ret:
+            if not self.stop_event.is_set():
+                print("Frame source finished" if self.source.finished else "Failed to capture frame")
+                self.stop_event.set()
+            return None
+        self.startup.mark('first_frame')
+        return FramePacket(frame, self.grabber.last_read_time, self.grabber.read_seq)
+
+    def process_frame(self, packet):
+        """Inference stage: convert, run MediaPipe and recognize gestures
+
+        The frame stays unmirrored; the tracker returns mirrored landmarks and
+        only the preview is flipped (see render).
+        """
+        start = time.perf_counter()
+        self.profiler.record('frame_age', start - packet.capture_time)
+        packet.roi = self.tracker.roi
+        
+        if not self.scheduler.should_infer(self.predictor.speed()):
+            # Reuse the last landmarks and extrapolate the fingertip
+            packet.inferred = False
+            packet.hands = self.last_hands
+            packet.handedness = self.last_handedness
+            packet.tracks = self.last_tracks
+            if self.predictor.initialized:
+                packet.predicted_tip = self.predictor.predict(packet.capture_time)
+            self.calculate_fps()
+            self.governor.record(time.perf_counter() - start)
+            return packet
+        
+        # Process frame (cropped around the previous hand when tracking)
+        inference_start = time.perf_counter()
+        results = self.tracker.process(packet.frame)
+        recognition_start = time.perf_counter()
+        self.scheduler.record_inference(recognition_start - inference_start)
+        self.profiler.record('convert', self.tracker.last_convert_time)
+        self.profiler.record('inference', self.tracker.last_inference_time)
+        
+        if results.multi_hand_landmarks:
+            # Convert once per frame; recognition and overlay share the features
+            frame_features = [self.get_hand_features(hand_landmarks)
+                              for hand_landmarks in results.multi_hand_landmarks]
+            gestures = self.recognize_gestures(frame_features)
+            packet.hands.extend(zip(results.multi_hand_landmarks, frame_features, gestures))
+            packet.handedness = [hand.classification[0].label for hand in results.multi_handedness] \
+                if getattr(results, 'multi_handedness', None) else [None] * len(packet.hands)
+        
+        # Associate the hands with their tracks
+        packet.tracks, packet.lost_tracks, packet.removed_tracks = self.associator.update(
+            packet.handedness, [features for _, features, _ in packet.hands])
+        
+        cursor = self.cursor_hand(packet)
+        if cursor is not None:
+            index_tip = packet.hands[cursor][1].points[8]
+            self.predictor.update(float(index_tip[0]), float(index_tip[1]), packet.capture_time)
+        else:
+            self.predictor.reset()
+        self.last_hands = packet.hands
+        self.last_handedness = packet.handedness
+        self.last_tracks = packet.tracks
+        self.profiler.record('recognition', time.perf_counter() - recognition_start)
+        
+        if self.recorder is not None:
+            self.recorder.add(packet)
+        
+        # Calculate FPS
+        self.calculate_fps()
+        self.governor.record(time.perf_counter() - start)
+        return packet
+
+    def actuate(self, packet):
+        """Actuation stage: move the cursor and execute gestures"""
+        start = time.perf_counter()
+        self.actuator.tag = packet.frame_id
+        if not packet.inferred:
+            # Between inferences only the cursor follows the predicted fingertip
+            cursor = self.cursor_hand(packet)
+            if packet.predicted_tip is not None and cursor is not None and \
+                    packet.hands[cursor][2] in CURSOR_GESTURES:
+                self.move_cursor_normalized(*packet.predicted_tip, packet.capture_time, packet.tracks[cursor])
+        else:
+            for (hand_landmarks, features, gesture), track in zip(packet.hands, packet.tracks):
+                # Control cursor for appropriate gestures
+                if track.role == 'cursor' and gesture in CURSOR_GESTURES:
+                    self.control_cursor(features.points, packet.frame.shape, packet.capture_time, track)
+                self.execute_gesture(gesture, features, track)
+            
+            # Every inferred frame advances each hand's state machine, also when it is not seen
+            for track in packet.lost_tracks:
+                self.execute_gesture(HandGesture.NONE, None, track)
+            for track in packet.removed_tracks:
+                self.release_hand(track)
+        
+        end = time.perf_counter()
+        self.profiler.record('actuation', end - start)
+        self.profiler.record('end_to_end', end - packet.capture_time)
+        return packet
+
+    def render(self, packet):
+        """Render stage: draw overlays, show the frame and handle keys
+
+        Returns False when the user asked to quit.
+        """
+        now = time.perf_counter()
+        if now - self.last_preview_time < self.preview_interval:
+            return True
+        self.last_preview_time = now
+        
+        # Mirror the frame for display only, into a buffer reused by every preview
+        if self.preview_frame is None or self.preview_frame.shape != packet.frame.shape:
+            self.preview_frame = np.empty_like(packet.frame)
+        frame = cv2.flip(packet.frame, 1, dst=self.preview_frame)
+        draw_start = time.perf_counter()
+        self.profiler.record('flip', draw_start - now)
+        if packet.roi is not None:
+            x0, y0, x1, y1 = packet.roi
+            width = frame.shape[1]
+            cv2.rectangle(frame, (width - x1, y0), (width - x0, y1), (128, 128, 128), 1)
+        
+        if self.overlay is not None:
+            self.overlay.draw(frame, self, packet)
+        elif packet.hands:
+            for hand_landmarks, features, gesture in packet.hands:
+                # Draw landmarks and information
+                self.draw_landmarks_and_info(frame, hand_landmarks, gesture, features)
+        else:
+            # No hand detected
+            cv2.putText(frame, "No hand detected - Show your hand to the camera", 
+                       (10, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        
+        display_start = time.perf_counter()
+        self.profiler.record('drawing', display_start - draw_start)
+        
+        # Display frame
+        cv2.imshow("Professional Hand Mouse Controller", frame)
+        
+        # Exit condition
+        key = cv2.waitKey(1) & 0xFF
+        self.profiler.record('display', time.perf_counter() - display_start)
+        if key == ord('q'):
+            return False
+        elif key == ord('c'):  # Calibrate
+            print("Calibration mode - Move your hand to corners of the screen")
+        elif key == ord('f'):  # Next smoothing filter
+            self.cycle_cursor_filter()
+        elif key == ord('p'):  # Toggle latency compensation
+            self.predictive_cursor = not self.predictive_cursor
+            self.compensator.reset()
+            print(f"Predictive cursor: {'on' if self.predictive_cursor else 'off'}")
+        return True
+
+    def pipeline_stats(self):
+        """Per-stage queue depth, throughput and drop counts"""
+        stats = {}
+        if self.grabber is not None:
+            stats['capture'] = {
+                'depth': self.grabber.depth(),
+                'processed': self.grabber.frames_captured,
+                'dropped': self.grabber.frames_dropped,
+            }
+        for stage in self.stages:
+            stats[stage.name] = {
+                'processed': stage.processed,
+                'fps': stage.throughput(),
+                'busy_ms': 1000 * stage.busy_time / stage.processed if stage.processed else 0.0,
+            }
+        for stage_queue in self.stage_queues:
+            stats[stage_queue.name] = {
+                'depth': stage_queue.depth(),
+                'dropped': stage_queue.dropped,
+            }
+        stats['input'] = {
+            'depth': self.actuator.depth(),
+            'executed': self.actuator.executed,
+            'coalesced': self.actuator.coalesced,
+            'latency_ms': 1000 * self.actuator.average_latency(),
+            'max_latency_ms': 1000 * self.actuator.latency_max,
+        }
+        return stats
+
+    def print_pipeline_stats(self):
+        """Print a one-line summary per stage and queue"""
+        print("--- Pipeline ---")
+        for name, values in self.pipeline_stats().items():
+            details = ", ".join(f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                                for key, value in values.items())
+            print(f"  {name}: {details}")
+
+    def print_throughput(self):
+        """One-line throughput summary since run() started"""
+        elapsed = time.perf_counter() - self.run_start_time
+        average = self.frames_processed / elapsed if elapsed > 0 else 0.0
+        dropped = self.grabber.frames_dropped if self.grabber is not None else 0
+        print(f"Throughput: {average:.1f} fps average, {self.current_fps} fps now, "
+              f"{self.frames_processed} frames, {dropped} stale frames dropped, "
+              f"{self.actuator.executed} input actions")
+
+    def report_periodically(self):
+        """Print pipeline/throughput stats every stats_interval seconds"""
+        now = time.perf_counter()
+        if now - self.last_stats_print >= self.stats_interval:
+            if self.last_stats_print:
+                if self.stages:
+                    self.print_pipeline_stats()
+                self.print_throughput()
+                self.profiler.print_report("Latency (last interval)", cumulative=False)
+            self.last_stats_print = now
+
+    def install_signal_handlers(self):
+        """Stop cleanly on SIGINT/SIGTERM (headless mode has no 'q' key)"""
+        def request_stop(signum, frame):
+            print(f"\nReceived signal {signum}, shutting down...")
+            self.stop_event.set()
+        
+        signal.signal(signal.SIGINT, request_stop)
+        if hasattr(signal, 'SIGTERM'):
+            signal.signal(signal.SIGTERM, request_stop)
+
     def run(self):
         """Main control loop"""
         print("Starting Hand Mouse Controller...")
-        print("Show your hand to the camera to begin control")
+        if self.headless:
+            print("Running headless - send SIGINT or SIGTERM to stop")
+            self.install_signal_handlers()
+        else:
+            print("Show your hand to the camera to begin control")
+        
+        self.run_start_time = time.perf_counter()
+        self.grabber.start()
+        self.actuator.start()
         
         try:
-            while True:
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("Failed to capture frame")
-                    break
-                
-                # Flip frame horizontally for mirror effect
-                frame = cv2.flip(frame, 1)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Process frame
-                results = self.hands.process(frame_rgb)
-                
-                if results.multi_hand_landmarks:
-                    for hand_landmarks in results.multi_hand_landmarks:
-                        # Recognize gesture
-                        gesture = self.recognize_gesture(hand_landmarks.landmark)
-                        
-                        # Control cursor for appropriate gestures
-                        if gesture in [HandGesture.CURSOR_CONTROL, HandGesture.LEFT_CLICK, HandGesture.RIGHT_CLICK]:
-                            self.control_cursor(hand_landmarks.landmark, frame.shape)
-                        
-                        # Execute gesture
-                        if gesture != HandGesture.NONE:
-                            self.execute_gesture(gesture)
-                        
-                        # Draw landmarks and information
-                        self.draw_landmarks_and_info(frame, hand_landmarks, gesture)
-                
-                else:
-                    # No hand detected
-                    cv2.putText(frame, "No hand detected - Show your hand to the camera", 
-                               (10, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                
-                # Calculate FPS
-                self.calculate_fps()
-                
-                # Display frame
-                cv2.imshow("Professional Hand Mouse Controller", frame)
-                
-                # Exit condition
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
-                    break
-                elif key == ord('c'):  # Calibrate
-                    print("Calibration mode - Move your hand to corners of the screen")
-                    
+            if self.pipelined:
+                self.run_pipelined()
+            else:
+                self.run_sequential()
         except KeyboardInterrupt:
             print("\nShutting down...")
         except Exception as e:
@@ -462,15 +2615,409 @@ class HandMouseController:
         finally:
             self.cleanup()
 
+    def run_sequential(self):
+        """Run every step one after another on the calling thread"""
+        while not self.stop_event.is_set():
+            packet = self.read_packet()
+            if packet is None:
+                break
+            self.process_frame(packet)
+            self.actuate(packet)
+            if self.headless:
+                self.report_periodically()
+            elif not self.render(packet):
+                break
+
+    def run_pipelined(self):
+        """Run inference and actuation on worker threads, rendering on this one
+
+        Capture is the FrameGrabber thread (a latest-frame-wins slot).
+        Inference blocks when actuation falls behind, which in turn lets
+        the grabber drop stale camera frames; rendering only ever shows
+        the newest processed frame. Headless runs have no render stage.
+        """
+        actuation_queue = StageQueue("actuation_queue", maxsize=4, policy=StageQueue.BLOCK)
+        self.stage_queues = [actuation_queue]
+        
+        inference = PipelineStage("inference", self.read_packet, self.process_frame,
+                                  outputs=[actuation_queue], stop_event=self.stop_event)
+        actuation = PipelineStage("actuation", actuation_queue.get, self.actuate,
+                                  stop_event=self.stop_event)
+        self.stages = [inference, actuation]
+        
+        render = None
+        if not self.headless:
+            render_queue = StageQueue("render_queue", maxsize=1, policy=StageQueue.DROP_OLDEST)
+            inference.outputs.append(render_queue)
+            render = PipelineStage("render", render_queue.get, self.render, stop_event=self.stop_event)
+            self.stage_queues.append(render_queue)
+            self.stages.append(render)
+        
+        inference.start()
+        actuation.start()
+        
+        try:
+            while not self.stop_event.is_set():
+                if render is None:
+                    self.stop_event.wait(0.2)
+                # HighGUI windows must be driven from the main thread
+                elif render.step() is False:
+                    break
+                
+                self.report_periodically()
+        finally:
+            self.stop_event.set()
+            for stage_queue in self.stage_queues:
+                stage_queue.close()
+            self.grabber.stop()
+            inference.join()
+            actuation.join()
+
     def cleanup(self):
         """Clean up resources"""
-        self.cap.release()
-        cv2.destroyAllWindows()
+        for track in self.associator.tracks:
+            self.release_hand(track)  # Let go of held modifier keys
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.source.release()
+            print(f"Frames captured: {self.grabber.frames_captured}, "
+                  f"dropped (stale): {self.grabber.frames_dropped}, stalls: {self.grabber.stalls}")
+        self.actuator.stop()
+        self.input.close()
+        if self.recorder is not None:
+            self.recorder.save()
+        if self.stages:
+            self.print_pipeline_stats()
+        self.print_throughput()
+        self.profiler.print_report("Latency (whole run)")
+        print(self.startup.summary())
+        if self.governor.enabled:
+            frames = ", ".join(f"{name} {count}" for name, count in self.governor.report()['frames_per_level'].items()
+                               if count)
+            print(f"Quality governor: {len(self.governor.changes)} changes, ended at {self.governor.current.name} "
+                  f"(frames per level: {frames or 'none'})")
+        if self.latency_report:
+            self.profiler.save_report(self.latency_report, {'startup': self.startup.report(),
+                                                            'quality': self.governor.report()})
+            print(f"Latency report written to {self.latency_report}")
+        print(f"Input actions: {self.actuator.executed} executed, {self.actuator.coalesced} moves merged, "
+              f"queue latency {1000 * self.actuator.average_latency():.1f} ms avg / "
+              f"{1000 * self.actuator.latency_max:.1f} ms max")
+        print(f"Inference: {self.tracker.roi_frames} cropped, {self.tracker.full_frames} full-frame, "
+              f"tracking lost {self.tracker.tracking_lost} times")
+        if self.compensator.predictions:
+            print(f"Predictive cursor: latency {1000 * self.compensator.latency:.1f} ms, "
+                  f"hidden {self.compensator.hidden_latency_ms():.1f} ms on average")
+        print(f"Scheduler: {self.scheduler.inferred_frames} inferred, {self.scheduler.skipped_frames} predicted, "
+              f"inference {1000 * self.scheduler.inference_time:.1f} ms, interval {self.scheduler.interval}")
+        if not self.headless:
+            cv2.destroyAllWindows()
         print("Hand Mouse Controller stopped successfully!")
 
+# Handedness stored by SessionRecorder; -1 is an absent hand or unknown handedness
+HANDEDNESS_CODES = {None: -1, 'Left': 0, 'Right': 1}
+HANDEDNESS_BY_CODE = {code: label for label, code in HANDEDNESS_CODES.items()}
+
+class SessionRecorder:
+    """Records per-frame hand landmarks and gestures to a compressed .npz session
+
+    Only inferred frames are stored. Each frame holds up to max_hands hands
+    as (21, 3) landmark arrays (NaN when absent), their gesture codes (-1
+    when absent) and their handedness codes (HANDEDNESS_CODES, -1 when
+    absent or unknown). The controller sizes max_hands to the number of
+    hands it tracks; hands beyond it are not recorded, which is reported
+    once. With record_frames the camera frames are mirrored, like the
+    preview, and stored as JPEG, downscaled by frame_scale.
+    """
+    VERSION = 2
+
+    def __init__(self, path, record_frames=False, max_hands=2, frame_scale=0.5, jpeg_quality=80):
+        self.path = path
+        self.record_frames = record_frames
+        self.max_hands = max_hands
+        self.frame_scale = frame_scale
+        self.jpeg_quality = jpeg_quality
+        self.timestamps = []
+        self.landmarks = []
+        self.gestures = []
+        self.handedness = []
+        self.frames = []
+        self.frame_shape = (0, 0)
+        self.dropped_hands = 0
+
+    def add(self, packet):
+        """Append one inferred FramePacket"""
+        if len(packet.hands) > self.max_hands:
+            if not self.dropped_hands:
+                print(f"Recording keeps {self.max_hands} hands per frame; extra hands are not recorded")
+            self.dropped_hands += len(packet.hands) - self.max_hands
+        landmarks = np.full((self.max_hands, 21, 3), np.nan, dtype=np.float32)
+        gestures = np.full(self.max_hands, -1, dtype=np.int8)
+        handedness = np.full(self.max_hands, -1, dtype=np.int8)
+        for index, (_, features, gesture) in enumerate(packet.hands[:self.max_hands]):
+            landmarks[index] = features.points
+            gestures[index] = GESTURE_CODES[gesture]
+            if index < len(packet.handedness):
+                handedness[index] = HANDEDNESS_CODES[packet.handedness[index]]
+        
+        self.timestamps.append(packet.capture_time)
+        self.landmarks.append(landmarks)
+        self.gestures.append(gestures)
+        self.handedness.append(handedness)
+        self.frame_shape = packet.frame.shape[:2]
+        
+        if self.record_frames:
+            small = cv2.flip(cv2.resize(packet.frame, None, fx=self.frame_scale, fy=self.frame_scale,
+                                        interpolation=cv2.INTER_AREA), 1)
+            ok, encoded = cv2.imencode('.jpg', small, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            self.frames.append(encoded.ravel() if ok else np.zeros(0, dtype=np.uint8))
+
+    def save(self):
+        """Write the session file"""
+        arrays = {
+            'version': np.array(self.VERSION),
+            'timestamps': np.array(self.timestamps, dtype=np.float64),
+            'landmarks': np.array(self.landmarks, dtype=np.float32).reshape(-1, self.max_hands, 21, 3),
+            'gestures': np.array(self.gestures, dtype=np.int8).reshape(-1, self.max_hands),
+            'handedness': np.array(self.handedness, dtype=np.int8).reshape(-1, self.max_hands),
+            'frame_shape': np.array(self.frame_shape, dtype=np.int32),
+        }
+        if self.frames:
+            arrays['frame_offsets'] = np.cumsum([0] + [len(frame) for frame in self.frames])
+            arrays['frame_data'] = np.concatenate(self.frames)
+        np.savez_compressed(self.path, **arrays)
+        print(f"Recorded {len(self.timestamps)} frames to {self.path}"
+              + (f" ({self.dropped_hands} hands beyond {self.max_hands} not recorded)" if self.dropped_hands else ""))
+
+class Session:
+    """A recorded session loaded from a SessionRecorder .npz file"""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.timestamps = data['timestamps']
+            self.landmarks = data['landmarks']   # (F, max_hands, 21, 3), NaN when absent
+            self.gestures = data['gestures']     # (F, max_hands), -1 when absent
+            # (F, max_hands) HANDEDNESS_CODES; version 1 sessions did not record it
+            self.handedness = data['handedness'] if 'handedness' in data else np.full_like(self.gestures, -1)
+            self.frame_shape = tuple(int(value) for value in data['frame_shape'])
+            self.frame_offsets = data['frame_offsets'] if 'frame_offsets' in data else None
+            self.frame_data = data['frame_data'] if 'frame_data' in data else None
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def hands(self, index):
+        """(landmarks, gesture code) pairs present in frame index"""
+        return [(self.landmarks[index, hand], int(self.gestures[index, hand]))
+                for hand in range(self.gestures.shape[1]) if self.gestures[index, hand] >= 0]
+
+    def hand_labels(self, index):
+        """Handedness ("Left", "Right" or None) of each hands(index) entry"""
+        return [HANDEDNESS_BY_CODE[int(self.handedness[index, hand])]
+                for hand in range(self.gestures.shape[1]) if self.gestures[index, hand] >= 0]
+
+    def frame(self, index):
+        """Decoded BGR frame, or None if frames were not recorded"""
+        if self.frame_data is None:
+            return None
+        start, end = self.frame_offsets[index], self.frame_offsets[index + 1]
+        return cv2.imdecode(self.frame_data[start:end], cv2.IMREAD_COLOR)
+
+class ReplayClock:
+    """Injectable clock whose time is set by the replay engine"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class SessionReplayer:
+    """Feeds a recorded session through recognize_gesture, control_cursor and execute_gesture
+
+    The controller's clock is replaced by a ReplayClock that follows the
+    recorded timestamps, so gesture timing and cursor filtering behave
+    exactly as during recording. With realtime=False frames are replayed as
+    fast as possible; with realtime=True the recorded pacing is kept.
+    """
+
+    def __init__(self, controller, session, realtime=False):
+        self.controller = controller
+        self.session = session
+        self.realtime = realtime
+        self.clock = ReplayClock()
+
+    def run(self):
+        """Replay every frame and return a summary dict"""
+        controller = self.controller
+        session = self.session
+        controller.clock = self.clock
+        frame_shape = session.frame_shape
+        
+        hands = 0
+        matches = 0
+        gesture_counts = {}
+        wall_start = time.perf_counter()
+        first_timestamp = session.timestamps[0] if len(session) else 0.0
+        
+        for index in range(len(session)):
+            timestamp = float(session.timestamps[index])
+            self.clock.now = timestamp
+            if self.realtime:
+                delay = wall_start + (timestamp - first_timestamp) - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            
+            recorded = session.hands(index)
+            frame_features = [controller.get_hand_features(points) for points, _ in recorded]
+            tracks, lost_tracks, removed_tracks = controller.associator.update(session.hand_labels(index),
+                                                                               frame_features)
+            gestures = controller.recognize_gestures(frame_features)
+            for (points, recorded_code), features, gesture, track in zip(recorded, frame_features, gestures,
+                                                                          tracks):
+                if track.role == 'cursor' and gesture in CURSOR_GESTURES:
+                    controller.control_cursor(points, frame_shape, timestamp, track)
+                controller.execute_gesture(gesture, features, track)
+                
+                hands += 1
+                matches += GESTURE_CODES[gesture] == recorded_code
+                gesture_counts[gesture.value] = gesture_counts.get(gesture.value, 0) + 1
+            for track in lost_tracks:
+                controller.execute_gesture(HandGesture.NONE, None, track)
+            for track in removed_tracks:
+                controller.release_hand(track)
+        
+        elapsed = time.perf_counter() - wall_start
+        return {
+            'frames': len(session),
+            'hands': hands,
+            'seconds': elapsed,
+            'frames_per_second': len(session) / elapsed if elapsed > 0 else 0.0,
+            'agreement': matches / hands if hands else 1.0,
+            'gestures': gesture_counts,
+        }
+
+def replay_session(path, realtime=False, input_backend="recording", screen_size=None):
+    """Replay a recorded session without a camera and print the summary"""
+    controller = HandMouseController(capture=False, input_backend=input_backend, headless=True,
+                                     screen_size=screen_size)
+    session = Session(path)
+    summary = SessionReplayer(controller, session, realtime).run()
+    controller.input.close()
+    
+    print(f"Replayed {summary['frames']} frames ({summary['hands']} hands) in {summary['seconds']:.2f} s "
+          f"- {summary['frames_per_second']:.0f} frames/s")
+    print(f"Agreement with recorded gestures: {100 * summary['agreement']:.1f}%")
+    for gesture, count in sorted(summary['gestures'].items()):
+        print(f"  {gesture}: {count}")
+    if hasattr(controller.input, 'summary'):
+        print(f"Input events: {controller.input.summary()['actions']}")
+    return summary
+
+def parse_roles(text):
+    """Parse "Right=cursor,Left=modifier" into a handedness -> role dict"""
+    roles = {}
+    for item in text.split(','):
+        hand, _, role = item.partition('=')
+        hand = hand.strip().capitalize()
+        role = role.strip().lower()
+        if hand not in ('Left', 'Right') or role not in HAND_ROLES:
+            raise argparse.ArgumentTypeError(f"Invalid hand role '{item}' (HAND=ROLE with HAND Left or Right "
+                                             f"and ROLE one of {', '.join(HAND_ROLES)})")
+        roles[hand] = role
+    return roles
+
+def parse_size(text):
+    """Parse "1920x1080" into (width, height)"""
+    width, _, height = text.lower().partition('x')
+    if not (width.isdigit() and height.isdigit()):
+        raise argparse.ArgumentTypeError(f"Invalid size '{text}' (expected WIDTHxHEIGHT, e.g. 1920x1080)")
+    return int(width), int(height)
+
+def parse_args(argv=None):
+    """Command line options for the hand mouse controller"""
+    parser = argparse.ArgumentParser(description="Hand gesture mouse controller")
+    parser.add_argument("--headless", action="store_true",
+                        help="no preview window or overlay; stop with SIGINT/SIGTERM")
+    parser.add_argument("--sequential", action="store_true",
+                        help="run every step on one thread instead of the pipeline")
+    parser.add_argument("--roi-tracking", action="store_true",
+                        help="run inference on a crop around the last hand instead of the full frame")
+    parser.add_argument("--no-adaptive", action="store_true", help="run inference on every frame")
+    parser.add_argument("--cursor-filter", default="one_euro", choices=list(CURSOR_FILTERS),
+                        help="cursor smoothing filter")
+    parser.add_argument("--predictive", action="store_true", help="enable the latency-compensating cursor")
+    parser.add_argument("--overlay-rate", type=float, default=15.0,
+                        help="overlay refresh rate in Hz (0 redraws everything every frame)")
+    parser.add_argument("--preview-rate", type=float, default=30.0,
+                        help="maximum preview window updates per second (0 for every frame)")
+    parser.add_argument("--no-profile", action="store_true", help="disable per-stage latency histograms")
+    parser.add_argument("--latency-report", metavar="PATH", help="write the latency histograms as JSON on exit")
+    parser.add_argument("--record", metavar="PATH", help="record landmarks and gestures to an .npz session")
+    parser.add_argument("--record-frames", action="store_true", help="also store (downscaled JPEG) frames")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recorded session without a camera")
+    parser.add_argument("--realtime", action="store_true", help="replay at the recorded pace")
+    parser.add_argument("--input", default=None,
+                        help="input backend: auto, pyautogui, xtest, uinput or recording")
+    parser.add_argument("--screen", type=parse_size, metavar="WIDTHxHEIGHT",
+                        help="screen size for the uinput backend (detected from the display by default)")
+    parser.add_argument("--source", default=None,
+                        help="frame source: camera index, synthetic, image directory or video file")
+    parser.add_argument("--gesture-model", metavar="PATH",
+                        help="trained gesture classifier (.npz from gesture_classifier.py) instead of the rules")
+    parser.add_argument("--analog", action="store_true",
+                        help="scroll/volume/brightness gestures follow hand movement instead of fixed steps")
+    parser.add_argument("--analog-parameter", default="wrist_height", choices=list(ANALOG_PARAMETERS),
+                        help="hand parameter that drives analog control")
+    parser.add_argument("--camera-probe", default="auto", choices=["auto", "force", "off"],
+                        help="camera mode negotiation: cached probe, probe again, or fixed 1280x720@30")
+    parser.add_argument("--latency-target", type=float, default=50.0,
+                        help="capture latency target in ms for choosing the camera mode")
+    parser.add_argument("--sequential-startup", action="store_true",
+                        help="load the hand model, input backend and camera one after another")
+    parser.add_argument("--target-fps", type=float, default=30.0,
+                        help="frame rate the quality governor and inference scheduler aim for")
+    parser.add_argument("--no-governor", action="store_true",
+                        help="keep full inference resolution and overlay rate on slow machines")
+    parser.add_argument("--hands", type=int, default=1, help="maximum number of hands to track")
+    parser.add_argument("--roles", metavar="HAND=ROLE,...",
+                        help=f"role per handedness, e.g. Right=cursor,Left=modifier (roles: {', '.join(HAND_ROLES)})")
+    return parser.parse_args(argv)
+
 def main():
     """Main function to run the hand mouse controller"""
-    controller = HandMouseController()
+    args = parse_args()
+    if args.replay:
+        replay_session(args.replay, args.realtime, args.input or "recording", args.screen)
+        return
+    
+    controller = HandMouseController(
+        pipelined=not args.sequential,
+        roi_tracking=args.roi_tracking,
+        adaptive_inference=not args.no_adaptive,
+        cursor_filter=args.cursor_filter,
+        predictive_cursor=args.predictive,
+        input_backend=args.input,
+        screen_size=args.screen,
+        headless=args.headless,
+        overlay_rate=args.overlay_rate,
+        preview_rate=args.preview_rate,
+        profile=not args.no_profile,
+        latency_report=args.latency_report,
+        record_path=args.record,
+        record_frames=args.record_frames,
+        source=args.source,
+        gesture_model=args.gesture_model,
+        analog=args.analog,
+        analog_parameter=args.analog_parameter,
+        max_hands=args.hands,
+        camera_probe=args.camera_probe,
+        latency_target=args.latency_target,
+        parallel_startup=not args.sequential_startup,
+        target_fps=args.target_fps,
+        quality_governor=not args.no_governor,
+        hand_roles=parse_roles(args.roles) if args.roles else None,
+    )
     controller.run()
 
 if __name__ == "__main__":
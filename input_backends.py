@@ -0,0 +1,499 @@
+"""
+Input Injection Backends
+Cursor and keyboard output shared by the hand, eye and voice controllers.
+
+Backends:
+- pyautogui: the portable default (Windows, macOS, X11)
+- xtest: direct X11 XTest injection through python-xlib
+- uinput: Linux kernel virtual device through python-evdev (works on
+  Wayland and on the console, needs write access to /dev/uinput)
+- recording: in-memory backend that timestamps every event, for measuring
+  injection throughput and end-to-end latency on headless machines
+
+The backend is chosen with create_backend(); when no name is given the
+VIRTUAL_MOUSE_INPUT environment variable is used, falling back to "auto".
+"""
+
+import glob
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Characters typed with shift on a US keyboard layout, and the key that produces them
+SHIFTED_CHARACTERS = {
+    '!': '1', '@': '2', '#': '3', '$': '4', '%': '5', '^': '6', '&': '7', '*': '8', '(': '9', ')': '0',
+    '_': '-', '+': '=', '{': '[', '}': ']', '|': '\\', ':': ';', '"': "'", '<': ',', '>': '.', '?': '/',
+    '~': '`',
+}
+UNSHIFTED_CHARACTERS = set("abcdefghijklmnopqrstuvwxyz0123456789-=[]\\;',./`")
+CHARACTER_KEYS = {' ': 'space', '\n': 'enter', '\t': 'tab'}
+
+def character_key(character):
+    """(key name, needs shift) that types character on a US layout
+
+    Raises ValueError for characters no key produces.
+    """
+    if character in CHARACTER_KEYS:
+        return CHARACTER_KEYS[character], False
+    if character in UNSHIFTED_CHARACTERS:
+        return character, False
+    if 'A' <= character <= 'Z':
+        return character.lower(), True
+    if character in SHIFTED_CHARACTERS:
+        return SHIFTED_CHARACTERS[character], True
+    raise ValueError(f"Cannot type {character!r}: no key produces it on a US keyboard layout")
+
+class InputBackend:
+    """Interface for cursor and keyboard output
+
+    Subclasses implement size(), _move(), mouse_down(), mouse_up(),
+    scroll(), key_down() and key_up(); everything else is built on those.
+    """
+    name = "base"
+
+    def __init__(self):
+        self.position = (0, 0)
+
+    def size(self):
+        """Screen (width, height) in pixels"""
+        raise NotImplementedError
+
+    def _move(self, x, y):
+        raise NotImplementedError
+
+    def move_to(self, x, y, duration=0):
+        """Move the cursor, gliding over duration seconds if given"""
+        if duration > 0:
+            start_x, start_y = self.position
+            steps = max(1, int(duration / 0.01))
+            for step in range(1, steps):
+                self._move(int(start_x + (x - start_x) * step / steps),
+                           int(start_y + (y - start_y) * step / steps))
+                time.sleep(duration / steps)
+        self._move(int(x), int(y))
+        self.position = (int(x), int(y))
+
+    def mouse_down(self, button='left'):
+        raise NotImplementedError
+
+    def mouse_up(self, button='left'):
+        raise NotImplementedError
+
+    def click(self, button='left'):
+        self.mouse_down(button)
+        self.mouse_up(button)
+
+    def right_click(self):
+        self.click('right')
+
+    def double_click(self):
+        self.click()
+        self.click()
+
+    def scroll(self, amount):
+        """Scroll by amount clicks; positive scrolls up"""
+        raise NotImplementedError
+
+    def key_down(self, key):
+        raise NotImplementedError
+
+    def key_up(self, key):
+        raise NotImplementedError
+
+    def press(self, key, presses=1):
+        """Tap a key (pyautogui key names) presses times"""
+        for _ in range(presses):
+            self.key_down(key)
+            self.key_up(key)
+
+    def hotkey(self, *keys):
+        """Press keys together, releasing them in reverse order"""
+        for key in keys:
+            self.key_down(key)
+        for key in reversed(keys):
+            self.key_up(key)
+
+    @contextmanager
+    def hold(self, key):
+        """Keep key pressed for the duration of a with block"""
+        self.key_down(key)
+        try:
+            yield
+        finally:
+            self.key_up(key)
+
+    def write(self, text, interval=0):
+        """Type text one character at a time (US layout, see character_key)
+
+        Every character is checked before anything is typed, so text with an
+        untypeable character raises ValueError without typing half of it.
+        """
+        keys = [character_key(character) for character in text]
+        for key, shifted in keys:
+            if shifted:
+                with self.hold('shift'):
+                    self.press(key)
+            else:
+                self.press(key)
+            if interval:
+                time.sleep(interval)
+
+    def close(self):
+        """Release any resources held by the backend"""
+
+class PyAutoGuiBackend(InputBackend):
+    """Portable backend on top of pyautogui"""
+    name = "pyautogui"
+
+    def __init__(self, pause=0.0, failsafe=False):
+        super().__init__()
+        import pyautogui
+        self.pyautogui = pyautogui
+        self.previous_settings = (pyautogui.PAUSE, pyautogui.FAILSAFE)
+        pyautogui.PAUSE = pause
+        pyautogui.FAILSAFE = failsafe
+
+    def size(self):
+        return tuple(self.pyautogui.size())
+
+    def _move(self, x, y):
+        self.pyautogui.moveTo(x, y)
+
+    def move_to(self, x, y, duration=0):
+        self.pyautogui.moveTo(x, y, duration=duration)
+        self.position = (int(x), int(y))
+
+    def mouse_down(self, button='left'):
+        self.pyautogui.mouseDown(button=button)
+
+    def mouse_up(self, button='left'):
+        self.pyautogui.mouseUp(button=button)
+
+    def click(self, button='left'):
+        self.pyautogui.click(button=button)
+
+    def right_click(self):
+        self.pyautogui.rightClick()
+
+    def double_click(self):
+        self.pyautogui.doubleClick()
+
+    def scroll(self, amount):
+        self.pyautogui.scroll(amount)
+
+    def key_down(self, key):
+        self.pyautogui.keyDown(key)
+
+    def key_up(self, key):
+        self.pyautogui.keyUp(key)
+
+    def press(self, key, presses=1):
+        self.pyautogui.press(key, presses=presses)
+
+    def hotkey(self, *keys):
+        self.pyautogui.hotkey(*keys)
+
+    def write(self, text, interval=0):
+        self.pyautogui.write(text, interval=interval)
+
+    def close(self):
+        self.pyautogui.PAUSE, self.pyautogui.FAILSAFE = self.previous_settings
+
+# pyautogui key names that differ from X11 keysym names
+X11_KEYSYMS = {
+    'volumeup': 'XF86AudioRaiseVolume', 'volumedown': 'XF86AudioLowerVolume',
+    'volumemute': 'XF86AudioMute', 'playpause': 'XF86AudioPlay',
+    'nexttrack': 'XF86AudioNext', 'prevtrack': 'XF86AudioPrev',
+    'brightnessup': 'XF86MonBrightnessUp', 'brightnessdown': 'XF86MonBrightnessDown',
+    'enter': 'Return', 'return': 'Return', 'esc': 'Escape', 'escape': 'Escape',
+    'tab': 'Tab', 'space': 'space', ' ': 'space', 'backspace': 'BackSpace', 'delete': 'Delete',
+    'ctrl': 'Control_L', 'shift': 'Shift_L', 'alt': 'Alt_L', 'win': 'Super_L', 'command': 'Super_L',
+    'up': 'Up', 'down': 'Down', 'left': 'Left', 'right': 'Right',
+    'home': 'Home', 'end': 'End', 'pageup': 'Prior', 'pagedown': 'Next',
+}
+
+MOUSE_BUTTONS = {'left': 1, 'middle': 2, 'right': 3}
+
+class XTestBackend(InputBackend):
+    """X11 backend that injects events with the XTest extension (python-xlib)"""
+    name = "xtest"
+
+    def __init__(self, display_name=None):
+        super().__init__()
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+        self.X = X
+        self.XK = XK
+        self.xtest = xtest
+        self.display = display.Display(display_name)
+        self.screen = self.display.screen()
+        self.keycodes = {}
+
+    def size(self):
+        return self.screen.width_in_pixels, self.screen.height_in_pixels
+
+    def _move(self, x, y):
+        self.xtest.fake_input(self.display, self.X.MotionNotify, x=x, y=y)
+        self.display.flush()
+
+    def mouse_down(self, button='left'):
+        self.xtest.fake_input(self.display, self.X.ButtonPress, MOUSE_BUTTONS[button])
+        self.display.flush()
+
+    def mouse_up(self, button='left'):
+        self.xtest.fake_input(self.display, self.X.ButtonRelease, MOUSE_BUTTONS[button])
+        self.display.flush()
+
+    def scroll(self, amount):
+        # Buttons 4 and 5 are the wheel
+        button = 4 if amount > 0 else 5
+        for _ in range(abs(int(amount))):
+            self.xtest.fake_input(self.display, self.X.ButtonPress, button)
+            self.xtest.fake_input(self.display, self.X.ButtonRelease, button)
+        self.display.flush()
+
+    def keycode(self, key):
+        """X keycode for a pyautogui key name (cached)"""
+        if key not in self.keycodes:
+            keysym_name = X11_KEYSYMS.get(key.lower(), key if len(key) == 1 else key.capitalize())
+            keysym = self.XK.string_to_keysym(keysym_name)
+            if keysym == 0 and len(key) == 1:
+                keysym = ord(key)
+            keycode = self.display.keysym_to_keycode(keysym)
+            if keycode == 0:
+                raise ValueError(f"No keycode for key '{key}'")
+            self.keycodes[key] = keycode
+        return self.keycodes[key]
+
+    def key_down(self, key):
+        self.xtest.fake_input(self.display, self.X.KeyPress, self.keycode(key))
+        self.display.flush()
+
+    def key_up(self, key):
+        self.xtest.fake_input(self.display, self.X.KeyRelease, self.keycode(key))
+        self.display.flush()
+
+    def close(self):
+        self.display.close()
+
+# pyautogui key names that differ from Linux input event codes
+UINPUT_KEYS = {
+    'volumeup': 'KEY_VOLUMEUP', 'volumedown': 'KEY_VOLUMEDOWN', 'volumemute': 'KEY_MUTE',
+    'playpause': 'KEY_PLAYPAUSE', 'nexttrack': 'KEY_NEXTSONG', 'prevtrack': 'KEY_PREVIOUSSONG',
+    'brightnessup': 'KEY_BRIGHTNESSUP', 'brightnessdown': 'KEY_BRIGHTNESSDOWN',
+    'return': 'KEY_ENTER', 'escape': 'KEY_ESC', 'esc': 'KEY_ESC', ' ': 'KEY_SPACE',
+    '-': 'KEY_MINUS', '=': 'KEY_EQUAL', '[': 'KEY_LEFTBRACE', ']': 'KEY_RIGHTBRACE', '\\': 'KEY_BACKSLASH',
+    ';': 'KEY_SEMICOLON', "'": 'KEY_APOSTROPHE', ',': 'KEY_COMMA', '.': 'KEY_DOT', '/': 'KEY_SLASH',
+    '`': 'KEY_GRAVE',
+    'ctrl': 'KEY_LEFTCTRL', 'shift': 'KEY_LEFTSHIFT', 'alt': 'KEY_LEFTALT',
+    'win': 'KEY_LEFTMETA', 'command': 'KEY_LEFTMETA',
+}
+
+UINPUT_BUTTONS = {'left': 'BTN_LEFT', 'middle': 'BTN_MIDDLE', 'right': 'BTN_RIGHT'}
+
+class UinputBackend(InputBackend):
+    """Linux backend that writes events to a virtual uinput device (python-evdev)
+
+    The pointer is an absolute device covering width x height, so the
+    screen size has to be given (the kernel does not know it).
+    """
+    name = "uinput"
+
+    def __init__(self, width=1920, height=1080):
+        super().__init__()
+        from evdev import AbsInfo, UInput, ecodes
+        self.ecodes = ecodes
+        self.width = width
+        self.height = height
+
+        key_codes = [code for name, code in ecodes.ecodes.items()
+                     if name.startswith('KEY_') and code < ecodes.KEY_MAX]
+        button_codes = [getattr(ecodes, name) for name in UINPUT_BUTTONS.values()]
+        capabilities = {
+            ecodes.EV_KEY: sorted(set(key_codes + button_codes)),
+            ecodes.EV_ABS: [
+                (ecodes.ABS_X, AbsInfo(0, 0, width - 1, 0, 0, 0)),
+                (ecodes.ABS_Y, AbsInfo(0, 0, height - 1, 0, 0, 0)),
+            ],
+            ecodes.EV_REL: [ecodes.REL_WHEEL],
+        }
+        self.device = UInput(capabilities, name="virtual-mouse")
+
+    def size(self):
+        return self.width, self.height
+
+    def _move(self, x, y):
+        self.device.write(self.ecodes.EV_ABS, self.ecodes.ABS_X, x)
+        self.device.write(self.ecodes.EV_ABS, self.ecodes.ABS_Y, y)
+        self.device.syn()
+
+    def _button(self, button, value):
+        self.device.write(self.ecodes.EV_KEY, getattr(self.ecodes, UINPUT_BUTTONS[button]), value)
+        self.device.syn()
+
+    def mouse_down(self, button='left'):
+        self._button(button, 1)
+
+    def mouse_up(self, button='left'):
+        self._button(button, 0)
+
+    def scroll(self, amount):
+        self.device.write(self.ecodes.EV_REL, self.ecodes.REL_WHEEL, int(amount))
+        self.device.syn()
+
+    def keycode(self, key):
+        """Input event code for a pyautogui key name"""
+        name = UINPUT_KEYS.get(key.lower(), 'KEY_' + key.upper())
+        if not hasattr(self.ecodes, name):
+            raise ValueError(f"No input event code for key '{key}'")
+        return getattr(self.ecodes, name)
+
+    def key_down(self, key):
+        self.device.write(self.ecodes.EV_KEY, self.keycode(key), 1)
+        self.device.syn()
+
+    def key_up(self, key):
+        self.device.write(self.ecodes.EV_KEY, self.keycode(key), 0)
+        self.device.syn()
+
+    def close(self):
+        self.device.close()
+
+class RecordingBackend(InputBackend):
+    """Backend that only records events with time.perf_counter() timestamps
+
+    Each event is (timestamp, action, args, tag); tag is whatever the
+    caller last assigned to self.tag (e.g. the frame id that caused it), so
+    end-to-end latency can be computed without any display.
+    """
+    name = "recording"
+
+    def __init__(self, width=1920, height=1080):
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.events = []
+        self.tag = None
+        self.lock = threading.Lock()
+
+    def record(self, action, *args):
+        with self.lock:
+            self.events.append((time.perf_counter(), action, args, self.tag))
+
+    def size(self):
+        return self.width, self.height
+
+    def _move(self, x, y):
+        self.record('move', x, y)
+
+    def move_to(self, x, y, duration=0):
+        self.record('move', int(x), int(y))
+        self.position = (int(x), int(y))
+
+    def mouse_down(self, button='left'):
+        self.record('mouse_down', button)
+
+    def mouse_up(self, button='left'):
+        self.record('mouse_up', button)
+
+    def click(self, button='left'):
+        self.record('click', button)
+
+    def double_click(self):
+        self.record('double_click')
+
+    def scroll(self, amount):
+        self.record('scroll', amount)
+
+    def key_down(self, key):
+        self.record('key_down', key)
+
+    def key_up(self, key):
+        self.record('key_up', key)
+
+    def press(self, key, presses=1):
+        self.record('press', key, presses)
+
+    def hotkey(self, *keys):
+        self.record('hotkey', *keys)
+
+    def write(self, text, interval=0):
+        self.record('write', text)
+
+    def clear(self):
+        with self.lock:
+            self.events = []
+
+    def summary(self):
+        """Event count, per-action counts and injection rate"""
+        with self.lock:
+            events = list(self.events)
+        counts = {}
+        for _, action, _, _ in events:
+            counts[action] = counts.get(action, 0) + 1
+        duration = events[-1][0] - events[0][0] if len(events) > 1 else 0.0
+        return {
+            'events': len(events),
+            'actions': counts,
+            'duration': duration,
+            'events_per_second': (len(events) - 1) / duration if duration > 0 else 0.0,
+        }
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (PyAutoGuiBackend, XTestBackend, UinputBackend, RecordingBackend)
+}
+
+def detect_screen_size():
+    """(width, height) of the first connected display, or None
+
+    Read from the kernel's DRM connectors (the first listed mode is the
+    preferred one), which works without an X11 or Wayland connection, the
+    situation the uinput backend is meant for.
+    """
+    for status_path in sorted(glob.glob('/sys/class/drm/card*-*/status')):
+        try:
+            with open(status_path) as status_file:
+                if status_file.read().strip() != 'connected':
+                    continue
+            with open(os.path.join(os.path.dirname(status_path), 'modes')) as modes_file:
+                match = re.match(r'(\d+)x(\d+)', modes_file.readline())
+        except OSError:
+            continue
+        if match:
+            return int(match.group(1)), int(match.group(2))
+    return None
+
+def create_backend(name=None, pyautogui_pause=0.0, pyautogui_failsafe=False, screen_size=None):
+    """Create an input backend by name
+
+    "auto" prefers XTest on Linux/X11 and falls back to pyautogui when
+    python-xlib is missing or everywhere else. pyautogui_pause and
+    pyautogui_failsafe set pyautogui.PAUSE/FAILSAFE for the pyautogui backend.
+    screen_size (width, height) sets the uinput pointer range; when it is
+    None the size is detected (see detect_screen_size).
+    """
+    name = name or os.environ.get('VIRTUAL_MOUSE_INPUT', 'auto')
+
+    if name == 'auto':
+        if sys.platform.startswith('linux') and os.environ.get('DISPLAY'):
+            try:
+                return XTestBackend()
+            except Exception as e:
+                print(f"XTest input unavailable ({e}), using pyautogui")
+        name = 'pyautogui'
+
+    if name == 'pyautogui':
+        return PyAutoGuiBackend(pause=pyautogui_pause, failsafe=pyautogui_failsafe)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown input backend '{name}' (choose from auto, {', '.join(BACKENDS)})")
+    if name == 'uinput':
+        size = screen_size or detect_screen_size()
+        if size is None:
+            size = (1920, 1080)
+            print("Screen size not detected, uinput assumes 1920x1080 (set it with --screen WIDTHxHEIGHT)")
+        return UinputBackend(*size)
+    return BACKENDS[name]()
@@ -23,10 +23,14 @@ import platform
 import wmi
 import datetime
 from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+from input_backends import create_backend
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, filename='assistant.log', format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Keyboard and mouse output (pyautogui keeps its default pause and failsafe)
+input_backend = create_backend(pyautogui_pause=0.1, pyautogui_failsafe=True)
+
 # Initialize text-to-speech
 engine = pyttsx3.init('sapi5')
 engine.setProperty('voice', engine.getProperty('voices')[0].id)
@@ -380,7 +384,7 @@ if __name__ == "__main__":
                 print(f"Increasing volume by {level} steps")
                 speak(f"Turning volume up by {level} steps")
                 for _ in range(level):
-                    pyautogui.press('volumeup')
+                    input_backend.press('volumeup')
                     time.sleep(0.1)
             except Exception as e:
                 print(f"Volume adjustment error: {e}")
@@ -411,7 +415,7 @@ if __name__ == "__main__":
                 print(f"Decreasing volume by {level} steps")
                 speak(f"Turning volume down by {level} steps")
                 for _ in range(level):
-                    pyautogui.press('volumedown')
+                    input_backend.press('volumedown')
                     time.sleep(0.1)
             except Exception as e:
                 print(f"Volume adjustment error: {e}")
@@ -421,28 +425,28 @@ if __name__ == "__main__":
             current_state = "muting" if "unmute" not in query.lower() else "unmuting"
             print(f"{current_state.capitalize()} volume")
             speak(f"{current_state} volume")
-            pyautogui.press("volumemute")
+            input_backend.press("volumemute")
             time.sleep(0.3)
                         
         elif "click" in query:
             if "right click" in query:
                 speak("Right clicking")
-                pyautogui.rightClick()
+                input_backend.right_click()
             elif "double click" in query:
                 speak("Double clicking")
-                pyautogui.doubleClick()
+                input_backend.double_click()
             else:
                 speak("Clicking")
-                pyautogui.click()
+                input_backend.click()
                     
         elif "scroll down" in query:
             try:
                 scroll_amount = int(re.search(r'\d+', query).group()) if re.search(r'\d+', query) else 1
                 speak(f"Scrolling down {scroll_amount} times")
                 time.sleep(1)
-                pyautogui.click()
+                input_backend.click()
                 for _ in range(scroll_amount):
-                    pyautogui.scroll(-800)
+                    input_backend.scroll(-800)
                     time.sleep(0.3)
             except Exception as e:
                 print(f"Scroll failed: {e}")
@@ -453,9 +457,9 @@ if __name__ == "__main__":
                 scroll_amount = int(re.search(r'\d+', query).group()) if re.search(r'\d+', query) else 1
                 speak(f"Scrolling up {scroll_amount} times")
                 time.sleep(1)
-                pyautogui.click()
+                input_backend.click()
                 for _ in range(scroll_amount):
-                    pyautogui.scroll(800)
+                    input_backend.scroll(800)
                     time.sleep(0.3)
             except Exception as e:
                 print(f"Scroll failed: {e}")
@@ -464,7 +468,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["undo", "un do", "and do", "on do"]):
             try:
                 speak("Undoing last action")
-                pyautogui.hotkey('ctrl', 'z')
+                input_backend.hotkey('ctrl', 'z')
                 time.sleep(0.3)
             except Exception as e:
                 print(f"Undo failed: {e}")
@@ -474,9 +478,9 @@ if __name__ == "__main__":
             try:
                 speak("Redoing last action")
                 try:
-                    pyautogui.hotkey('ctrl', 'y')
+                    input_backend.hotkey('ctrl', 'y')
                 except:
-                    pyautogui.hotkey('ctrl', 'shift', 'z')
+                    input_backend.hotkey('ctrl', 'shift', 'z')
                 time.sleep(0.3)
             except Exception as e:
                 print(f"Redo failed: {e}")
@@ -485,7 +489,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["press enter", "hit enter", "enter key", "push enter", "send enter", "enter"]):
             try:
                 speak("Pressing enter")
-                pyautogui.press('enter')
+                input_backend.press('enter')
                 time.sleep(0.2)
             except Exception as e:
                 speak("Failed to press enter")
@@ -494,7 +498,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["press escape", "press esc", "escape key", "hit esc", "close menu"]):
             try:
                 speak("Pressing escape")
-                pyautogui.press('esc')
+                input_backend.press('esc')
                 time.sleep(0.2)
             except Exception as e:
                 speak("Couldn't press escape")
@@ -503,7 +507,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["press tab", "tab key", "next field", "move focus", "hit tab"]):
             try:
                 speak("Pressing tab")
-                pyautogui.press('tab')
+                input_backend.press('tab')
                 time.sleep(0.2)
             except Exception as e:
                 speak("Tab press failed")
@@ -512,7 +516,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["press space", "spacebar", "hit space", "space key", "push space"]):
             try:
                 speak("Pressing space")
-                pyautogui.press('space')
+                input_backend.press('space')
                 time.sleep(0.2)
             except Exception as e:
                 speak("Space press didn't work")
@@ -521,7 +525,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["press backspace", "delete left", "erase back", "backspace key", "remove character"]):
             try:
                 speak("Pressing backspace")
-                pyautogui.press('backspace')
+                input_backend.press('backspace')
                 time.sleep(0.2)
             except Exception as e:
                 speak("Backspace failed")
@@ -530,7 +534,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["press delete", "delete right", "erase forward", "del key", "remove right", "delete"]):
             try:
                 speak("Pressing delete")
-                pyautogui.press('delete')
+                input_backend.press('delete')
                 time.sleep(0.2)
             except Exception as e:
                 speak("Delete didn't work")
@@ -539,7 +543,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["refresh the page", "refresh page", "reload page", "refresh screen", "reload window", "f5 key"]):
             try:
                 speak("Refreshing page")
-                pyautogui.press('f5')
+                input_backend.press('f5')
                 time.sleep(0.5)
             except Exception as e:
                 speak("Refresh failed")
@@ -548,7 +552,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["full screen", "maximize screen", "toggle", "toggle fullscreen", "f11 key", "enter fullscreen"]):
             try:
                 speak("Toggling full screen")
-                pyautogui.press('f11')
+                input_backend.press('f11')
                 time.sleep(0.5)
             except Exception as e:
                 speak("Full screen toggle failed")
@@ -558,15 +562,15 @@ if __name__ == "__main__":
         elif any(word in query.lower() for word in ["cut text", "cut", "cut selection", "snip text", "copy remove", "cut to clipboard", "remove text", "clip text", "extract text", "cut selected"]):
             try:
                 # Check if text is selected by copying to clipboard and checking content
-                pyautogui.hotkey('ctrl', 'c')
+                input_backend.hotkey('ctrl', 'c')
                 time.sleep(0.1)
                 clipboard_content = pyperclip.paste()
                 if clipboard_content.strip():
                     speak("Cutting selected text")
                     if sys.platform == 'darwin':
-                        pyautogui.hotkey('command', 'x')
+                        input_backend.hotkey('command', 'x')
                     else:
-                        pyautogui.hotkey('ctrl', 'x')
+                        input_backend.hotkey('ctrl', 'x')
                     time.sleep(0.3)
                 else:
                     speak("Please select a text first")
@@ -587,21 +591,21 @@ if __name__ == "__main__":
                             speak("Opening Notepad to paste")
                             os.startfile(os.path.expandvars(r"%windir%\system32\notepad.exe"))
                             time.sleep(1)
-                            pyautogui.hotkey('ctrl', 'v')
+                            input_backend.hotkey('ctrl', 'v')
                         elif "word" in location:
                             speak("Please ensure Microsoft Word is open")
                             time.sleep(1)
-                            pyautogui.hotkey('ctrl', 'v')
+                            input_backend.hotkey('ctrl', 'v')
                         elif "click here" in location:
                             speak("Please click where you want to paste")
                             time.sleep(3)
-                            pyautogui.hotkey('ctrl', 'v')
+                            input_backend.hotkey('ctrl', 'v')
                         else:
                             speak("Pasting in the current application")
-                            pyautogui.hotkey('ctrl', 'v')
+                            input_backend.hotkey('ctrl', 'v')
                     else:
                         speak("No location specified. Pasting in the current application")
-                        pyautogui.hotkey('ctrl', 'v')
+                        input_backend.hotkey('ctrl', 'v')
                     time.sleep(0.3)
                 else:
                     speak("Nothing to paste. Please copy or cut something first")
@@ -627,7 +631,7 @@ if __name__ == "__main__":
         elif any(word in query for word in ["exit full screen", "f11 again", "off screen"]):
             try:
                 speak("Turning off full screen")
-                pyautogui.press('f11')
+                input_backend.press('f11')
                 time.sleep(0.5)
             except Exception as e:
                 speak("Could not exit fullscreen mode")
@@ -684,7 +688,7 @@ if __name__ == "__main__":
         elif any(cmd in query.lower() for cmd in ["open search", "press windows s", "search bar", "windows search"]):
             try:
                 speak("Opening Windows Search")
-                pyautogui.hotkey('win', 's')
+                input_backend.hotkey('win', 's')
                 time.sleep(0.5)
             except Exception as e:
                 speak("Failed to open Windows Search")
@@ -699,7 +703,7 @@ if __name__ == "__main__":
                 if text_to_write and text_to_write != "none":
                     speak(f"Typing: {text_to_write}")
                     time.sleep(1)
-                    pyautogui.write(text_to_write, interval=0.05)
+                    input_backend.write(text_to_write, interval=0.05)
                 else:
                     speak("No text provided. Cancelling write operation.")
             except Exception as e:
@@ -722,7 +726,7 @@ if __name__ == "__main__":
         elif any(cmd in query.lower() for cmd in ["maximize window", "full screen window", "enlarge window", "maximize screen", "maximize", "full screen"]):
             try:
                 speak("Maximizing the window")
-                pyautogui.hotkey('win', 'up')
+                input_backend.hotkey('win', 'up')
                 time.sleep(0.3)
             except Exception as e:
                 speak("Sorry, I couldn't maximize the window")
@@ -737,7 +741,7 @@ if __name__ == "__main__":
                 speak("Opening a new tab")
                 
                 # Press Ctrl + T to open a new tab in the active browser
-                pyautogui.hotkey('ctrl', 't')
+                input_backend.hotkey('ctrl', 't')
                 
                 # Small delay to ensure the action completes
                 time.sleep(0.5)
@@ -750,40 +754,40 @@ if __name__ == "__main__":
                             
         elif any(cmd in query.lower() for cmd in ["previous tab", "go to previous tab", "back tab", "switch to previous tab"]):
             speak("Switching to the previous tab")
-            pyautogui.hotkey('ctrl', 'shift', 'tab')
+            input_backend.hotkey('ctrl', 'shift', 'tab')
             time.sleep(0.3)
             
         elif any(cmd in query.lower() for cmd in ["open history", "show history", "history page", "view history"]):
             speak("Opening the history page")
-            pyautogui.hotkey('ctrl', 'h')
+            input_backend.hotkey('ctrl', 'h')
             time.sleep(0.3)
             
         elif any(cmd in query.lower() for cmd in ["open downloads", "show downloads", "downloads page", "view downloads"]):
             speak("Opening the downloads page")
-            pyautogui.hotkey('ctrl', 'j')
+            input_backend.hotkey('ctrl', 'j')
             time.sleep(0.3)
             
         elif any(cmd in query.lower() for cmd in ["next tab", "go to next tab", "forward tab", "switch to next tab"]):
             speak("Switching to the next tab")
-            pyautogui.hotkey('ctrl', 'tab')
+            input_backend.hotkey('ctrl', 'tab')
             time.sleep(0.3)
             
         elif any(cmd in query.lower() for cmd in ["close tab", "close current tab", "shut tab", "exit tab"]):
             speak("Closing the current tab")
-            pyautogui.hotkey('ctrl', 'w')
+            input_backend.hotkey('ctrl', 'w')
             time.sleep(0.3)
             
         elif any(cmd in query.lower() for cmd in ["close window", "close browser window", "shut window", "exit window"]):
             speak("Closing the current window")
-            pyautogui.hotkey('alt', 'f4')
+            input_backend.hotkey('alt', 'f4')
             time.sleep(0.3)
             
         elif any(cmd in query.lower() for cmd in ["clear browsing history", "delete history", "clear history", "erase history"]):
             try:
                 speak("Opening the clear browsing history dialog")
-                pyautogui.hotkey('ctrl', 'h')
+                input_backend.hotkey('ctrl', 'h')
                 time.sleep(1.5)
-                pyautogui.hotkey('ctrl', 'shift', 'delete')
+                input_backend.hotkey('ctrl', 'shift', 'delete')
                 time.sleep(1)
                 speak("Please select the time range and confirm to clear the history")
             except Exception as e:
@@ -792,7 +796,7 @@ if __name__ == "__main__":
         elif any(cmd in query.lower() for cmd in ["open start menu", "open windows menu", "start menu", "windows menu", "show start menu", "launch start menu"]):
             try:
                 speak("Opening the Start Menu")
-                pyautogui.press('win')  # Press Windows key to open Start Menu
+                input_backend.press('win')  # Press Windows key to open Start Menu
                 time.sleep(0.5)
                 speak("Start Menu opened successfully")
             except Exception as e:
@@ -813,7 +817,7 @@ if __name__ == "__main__":
         elif any(cmd in query.lower() for cmd in ["open this pc", "open my computer", "this pc", "my computer", "this PC", "open this PC"]):
             try:
                 speak("Attempting to open This PC")
-                pyautogui.hotkey('win', 'e')
+                input_backend.hotkey('win', 'e')
                 time.sleep(0.5)
                 speak("This PC opened successfully")
             except Exception as e:
@@ -863,7 +867,7 @@ if __name__ == "__main__":
         elif any(cmd in query.lower() for cmd in ["open setting", "open settings", "setting", "settings"]):
             try:
                 speak("Opening Settings")
-                pyautogui.hotkey("win", "i")
+                input_backend.hotkey("win", "i")
                 time.sleep(0.5)
                 speak("Settings opened successfully")
             except Exception as e:
@@ -873,7 +877,7 @@ if __name__ == "__main__":
         elif any(cmd in query.lower() for cmd in ["switch app", "next app", "switch application"]):
             try:
                 speak("Switching to the next application")
-                pyautogui.hotkey("alt", "tab")
+                input_backend.hotkey("alt", "tab")
                 time.sleep(0.5)
                 speak("Switched to the next application")
             except Exception as e:
@@ -913,7 +917,7 @@ if __name__ == "__main__":
         elif any(cmd in query.lower() for cmd in ["play media", "pause media", "play pause"]):
             try:
                 speak("Toggling play or pause for media")
-                pyautogui.press("playpause")
+                input_backend.press("playpause")
                 time.sleep(0.5)
                 speak("Media play or pause toggled")
             except Exception as e:
@@ -1023,7 +1027,7 @@ if __name__ == "__main__":
                 original_clipboard = pyperclip.paste()
 
                 # Simulate Ctrl+C
-                pyautogui.hotkey('ctrl', 'c')
+                input_backend.hotkey('ctrl', 'c')
                 time.sleep(0.3)
 
                 copied_text = pyperclip.paste()